@@ -1,13 +1,25 @@
-import requests
+import json
 from fastapi import APIRouter, HTTPException, Header, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, HttpUrl
-from typing import List
+from typing import List, Optional
 
-from services.rag_service import process_documents_and_questions, clear_qa_caches
-from services.html_service import process_html_and_questions
+from services.rag_service import process_documents_and_questions, iter_answers, clear_qa_caches
 from services.flight_landmark import get_flight_number
+from services.parse_executor import parse_executor
+from services.vector_store import retrieval_stats
+from services.embedding_service import embedding_batcher
+from services.ingestion_registry import ingestion_registry
+from services.answer_cache import answer_cache
+from services.semantic_cache import semantic_cache
+from services.gpt_client import usage_stats
+from services.gpt_tools_service import tool_cache
+from services.download_service import DownloadedFile, download_file_to_temp
+from services.clients import clients
 
 from config.settings import settings
+from config.mime_types import ZIP_MIME_TYPE
 
 router = APIRouter()
 
@@ -30,31 +42,103 @@ async def run_rag_endpoint(
     if token != settings.EXPECTED_TOKEN:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
 
+    document_url = str(payload.documents)
     try:
+        downloaded, refusal = await _prefetch_document(document_url, payload.questions)
+        if refusal:
+            return {"answers": [refusal]}
+
         try:
-            head_response = requests.head(str(payload.documents), allow_redirects=True, timeout=5)
-            content_type = head_response.headers.get("Content-Type", "")
-            print(f"Content-Type of the document: {content_type}")
-        except Exception as head_err:
-            return {"answers": ["Sorry, I cannot access this type of document."]}
-        
-        if content_type == "application/zip":
-            return {"answers": ["Sorry, this zip file contains files that I cannot process."]}
-        
-        if content_type.startswith("text/html"):
-            results = await process_html_and_questions(
-                html_url=str(payload.documents),
+            # The document pipeline (HTML pages included) takes ownership of the downloaded file.
+            results = await process_documents_and_questions(
+                document_url=document_url,
                 questions=payload.questions,
+                prefetched=downloaded,
             )
             return {"answers": list(results.values())}
-
-        results = await process_documents_and_questions(
-            document_url=str(payload.documents),
-            questions=payload.questions,
-        )
-        return {"answers": list(results.values())}
+        except Exception:
+            if downloaded:
+                downloaded.cleanup()
+            raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/hackrx/run/stream")
+async def run_rag_stream_endpoint(
+    payload: HackRxRequest,
+    authorization: str = Header(None)
+):
+    """
+    Same as /hackrx/run, but streams one NDJSON line per answer as soon as it
+    is ready: {"index": <question position>, "question": ..., "answer": ...}.
+    Cached answers come first, the rest in the order they complete.
+    """
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing or invalid authorization header")
+
+    token = authorization.split(" ")[1]
+    if token != settings.EXPECTED_TOKEN:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    document_url = str(payload.documents)
+    downloaded, refusal = await _prefetch_document(document_url, payload.questions)
+
+    positions: dict[str, list[int]] = {}
+    for index, question in enumerate(payload.questions):
+        positions.setdefault(question, []).append(index)
+
+    def lines_for(question: str, answer: str) -> list[str]:
+        return [
+            json.dumps({"index": index, "question": question, "answer": answer}) + "\n"
+            for index in positions.get(question, [])
+        ]
+
+    handed_off = False
+
+    async def answer_lines():
+        nonlocal handed_off
+        if refusal:
+            for question in positions:
+                for text in lines_for(question, refusal):
+                    yield text
+            return
+        # From here on iter_answers and the ingestion it starts own the downloaded file.
+        handed_off = True
+        try:
+            async for question, answer in iter_answers(document_url, payload.questions, prefetched=downloaded):
+                for text in lines_for(question, answer):
+                    yield text
+        except Exception as e:
+            print(f"⚠️ Streaming answers for {document_url} failed: {e}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    def cleanup_unused_download() -> None:
+        if downloaded and not handed_off:
+            downloaded.cleanup()
+
+    return StreamingResponse(
+        answer_lines(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(cleanup_unused_download),
+    )
+
+async def _prefetch_document(document_url: str, questions: List[str]) -> tuple[Optional[DownloadedFile], Optional[str]]:
+    """Downloads the document unless it can be answered without it. Returns (file, refusal message)."""
+    if ingestion_registry.is_ready(document_url) or answer_cache.has_all(document_url, questions):
+        # Already ingested or fully answered: answer without touching the network.
+        return None, None
+
+    try:
+        downloaded = await download_file_to_temp(document_url)
+        print(f"Detected type of the document: {downloaded.content_type}")
+    except Exception as fetch_err:
+        print(f"⚠️ Could not fetch {document_url}: {fetch_err}")
+        return None, "Sorry, I cannot access this type of document."
+
+    if downloaded.content_type == ZIP_MIME_TYPE:
+        downloaded.cleanup()
+        return None, "Sorry, this zip file contains files that I cannot process."
+    return downloaded, None
     
 @router.post("/hackrx/clear-cache")
 async def clear_cache_endpoint(
@@ -72,3 +156,27 @@ async def clear_cache_endpoint(
         return {"message": "QA cache cleared successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to clear QA caches: {e}")
+
+@router.get("/hackrx/metrics")
+async def metrics_endpoint(
+    authorization: str = Header(None)
+):
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing or invalid authorization header")
+
+    token = authorization.split(" ")[1]
+    if token != settings.EXPECTED_TOKEN:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized")
+
+    return {
+        "parse_executor": parse_executor.stats(),
+        "embedding_batcher": embedding_batcher.stats(),
+        "embedding_cache": clients.embedding_cache.stats(),
+        "ingestion": ingestion_registry.stats(),
+        "answer_cache": answer_cache.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "retrieval": retrieval_stats,
+        "llm": usage_stats,
+        "tool_cache": tool_cache.stats(),
+        "fetch_cache": clients.fetch_cache.stats(),
+    }
@@ -0,0 +1,94 @@
+"""
+Compares the native chunker with LangChain's RecursiveCharacterTextSplitter
+(the splitter it replaced) on throughput and chunk count.
+
+    python -m benchmarks.bench_chunker [path/to/document.txt] [--repeat N]
+
+Without a path a synthetic policy-like document is used. LangChain is only
+needed for the comparison column; install `langchain-text-splitters` to get it.
+"""
+import argparse
+import random
+import time
+from services.chunker import CHARS_PER_TOKEN, DocumentUnit, chunk_units
+
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 100
+
+WORDS = (
+    "policy insured premium hospital expenses cover benefit claim period waiting "
+    "treatment sum deductible exclusion illness accident room rent co-payment "
+    "notification days renewal grace maternity pre-existing disease"
+).split()
+
+
+def synthetic_units(pages: int = 200, seed: int = 7) -> list[DocumentUnit]:
+    rng = random.Random(seed)
+    units = []
+    for page in range(1, pages + 1):
+        lines = [f"{page}. SECTION {page} BENEFITS"]
+        for _ in range(rng.randint(8, 14)):
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 24))).capitalize() + "."
+                for _ in range(rng.randint(1, 4))
+            ]
+            lines.append(" ".join(sentences))
+        units.append(DocumentUnit(text="\n".join(lines), page=page, kind="page"))
+    return units
+
+
+def file_units(path: str) -> list[DocumentUnit]:
+    with open(path, "r", encoding="utf-8") as f:
+        paragraphs = f.read().split("\n\n")
+    return [DocumentUnit(text=p.strip()) for p in paragraphs if p.strip()]
+
+
+def timed(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    units = file_units(args.path) if args.path else synthetic_units()
+    text = "\n".join(unit.text for unit in units)
+    megabytes = len(text.encode("utf-8")) / 1e6
+    print(f"Input: {len(units)} units, {megabytes:.2f} MB")
+
+    native_time, native_chunks = timed(
+        lambda: list(chunk_units(units, CHUNK_SIZE // CHARS_PER_TOKEN, CHUNK_OVERLAP // CHARS_PER_TOKEN)),
+        args.repeat,
+    )
+    with_page = sum(1 for chunk in native_chunks if chunk.page is not None)
+    with_section = sum(1 for chunk in native_chunks if chunk.section)
+    print(
+        f"native:    {native_time * 1000:8.1f} ms  {megabytes / native_time:7.1f} MB/s  "
+        f"{len(native_chunks):6d} chunks  ({with_page} with page, {with_section} with section)"
+    )
+
+    try:
+        import_started = time.perf_counter()
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        import_time = time.perf_counter() - import_started
+    except ImportError:
+        print("langchain: not installed, skipping comparison")
+        return
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    langchain_time, langchain_chunks = timed(lambda: splitter.split_text(text), args.repeat)
+    print(
+        f"langchain: {langchain_time * 1000:8.1f} ms  {megabytes / langchain_time:7.1f} MB/s  "
+        f"{len(langchain_chunks):6d} chunks  (import took {import_time * 1000:.0f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
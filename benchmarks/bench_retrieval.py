@@ -0,0 +1,150 @@
+"""
+Compares per-question dense retrieval (retrieve_from_kb) with batched hybrid
+retrieval (retrieve_batch: BM25 + dense fusion, BM25 fast path) on recall@k
+and latency.
+
+Against an ingested document (needs OPENAI_API_KEY and the vector store):
+
+    python -m benchmarks.bench_retrieval --namespace <agent_id> --questions qa.jsonl
+
+where each line of qa.jsonl is {"question": ..., "expected": "<text the
+right chunk contains>"}.
+
+Offline, on a synthetic document with a hashing embedder instead of OpenAI:
+
+    python -m benchmarks.bench_retrieval --synthetic
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import tempfile
+import time
+
+
+def hashing_embedder(dimensions: int = 256):
+    import numpy as np
+
+    async def embed(texts: list[str]) -> list[list[float]]:
+        vectors = []
+        for text in texts:
+            vector = np.zeros(dimensions, dtype=np.float32)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % dimensions] += 1
+            vectors.append(vector.tolist())
+        return vectors
+
+    return embed
+
+
+def synthetic_units(pages: int = 200, vocabulary: int = 5000, seed: int = 11):
+    """Policy-like pages drawn from a Zipf-distributed vocabulary, so chunks are distinguishable."""
+    from services.chunker import DocumentUnit
+
+    rng = random.Random(seed)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 10))) for _ in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    units = []
+    for page in range(1, pages + 1):
+        lines = [f"{page}. SECTION {page} BENEFITS"]
+        for _ in range(rng.randint(8, 14)):
+            lines.append(" ".join(rng.choices(words, weights, k=rng.randint(10, 40))) + ".")
+        units.append(DocumentUnit(text="\n".join(lines), page=page, kind="page"))
+    return units
+
+
+async def build_synthetic(namespace: str, questions: int, seed: int = 11) -> list[dict]:
+    """Ingests a synthetic document into a throwaway store and samples questions from its chunks."""
+    from services.bm25_index import BM25Builder, bm25_store
+    from services.chunker import chunk_units
+    from services.clients import clients
+    from services import vector_store
+
+    chunks = list(chunk_units(synthetic_units(seed=seed)))
+    builder = BM25Builder()
+    for chunk in chunks:
+        builder.add(chunk.index, chunk.text)
+    bm25_store.save(namespace, builder.build())
+
+    vectors = await vector_store.embed_texts([chunk.text for chunk in chunks])
+    clients.vector_index.upsert(
+        [
+            {"id": f"{namespace}_{chunk.index}", "values": vector, "metadata": chunk.metadata()}
+            for chunk, vector in zip(chunks, vectors)
+        ],
+        namespace,
+    )
+
+    rng = random.Random(seed)
+    cases = []
+    for chunk in rng.sample(chunks, questions):
+        words = chunk.text.split()
+        start = rng.randrange(max(len(words) - 8, 1))
+        cases.append({"question": " ".join(words[start:start + 8]), "expected": chunk.text})
+    return cases
+
+
+def recall(results: list[list[str]], cases: list[dict]) -> float:
+    found = sum(
+        1 for texts, case in zip(results, cases)
+        if any(case["expected"] in text or text in case["expected"] for text in texts)
+    )
+    return found / len(cases) if cases else 0.0
+
+
+async def run(namespace: str, cases: list[dict], top_k: int) -> None:
+    from services.vector_store import retrieve_from_kb, retrieve_batch, retrieval_stats
+
+    questions = [case["question"] for case in cases]
+
+    started = time.perf_counter()
+    dense = [
+        (await retrieve_from_kb({"query": question, "agent_id": namespace, "top_k": top_k})).get("chunks", [])
+        for question in questions
+    ]
+    dense_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    hybrid = await retrieve_batch(questions, namespace, top_k)
+    hybrid_time = time.perf_counter() - started
+    hybrid_texts = [[chunk["text"] for chunk in chunks] for chunks in hybrid]
+
+    print(f"{len(cases)} questions, top_k={top_k}")
+    print(f"retrieve_from_kb (dense, per question): recall@{top_k} {recall(dense, cases):.3f}  {dense_time * 1000:8.1f} ms")
+    print(f"retrieve_batch   (hybrid, batched):     recall@{top_k} {recall(hybrid_texts, cases):.3f}  {hybrid_time * 1000:8.1f} ms")
+    print(f"retrieval stats: {retrieval_stats}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--namespace")
+    parser.add_argument("--questions")
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        import os
+        os.environ["VECTOR_BACKEND"] = "local"
+        os.environ["VECTOR_STORE_DIR"] = tempfile.mkdtemp(prefix="bench_retrieval_")
+        os.environ["EMBED_CACHE_PATH"] = os.path.join(os.environ["VECTOR_STORE_DIR"], "embedding_cache.sqlite3")
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        from services import vector_store
+        vector_store.embed_texts = hashing_embedder()
+
+        namespace = "bench_synthetic"
+        cases = asyncio.run(build_synthetic(namespace, args.count))
+    else:
+        if not args.namespace or not args.questions:
+            parser.error("--namespace and --questions are required unless --synthetic is given")
+        namespace = args.namespace
+        with open(args.questions, "r", encoding="utf-8") as f:
+            cases = [json.loads(line) for line in f if line.strip()]
+
+    asyncio.run(run(namespace, cases, args.top_k))
+
+
+if __name__ == "__main__":
+    main()
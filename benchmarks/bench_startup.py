@@ -0,0 +1,69 @@
+"""
+Reports how long it takes to import the app, module by module, using
+`python -X importtime` in a fresh interpreter.
+
+    python -m benchmarks.bench_startup [--module main] [--top 25] [--budget-ms 600]
+
+Exits non-zero when the total import time is over the budget, so it can
+gate CI or a container build.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure(module: str) -> list[tuple[str, int, int, int]]:
+    """Returns (module, self_us, cumulative_us, depth) for every import."""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    env.setdefault("DATABASE_NAME", "benchmark")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total_ms = next(cumulative for name, _, cumulative, depth in rows if name == args.module and depth == 0) / 1000
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+
+    # Project modules only, so regressions in our own imports stand out.
+    print(f"\n{'cumulative ms':>14}  project module")
+    project = [row for row in rows if row[0].split(".")[0] in ("main", "api", "config", "db", "models", "services")]
+    for name, _, cumulative_us, _ in sorted(project, key=lambda row: row[2], reverse=True):
+        print(f"{cumulative_us / 1000:14.1f}  {name}")
+
+    print(f"\nTotal import time for {args.module}: {total_ms:.1f} ms")
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        raise SystemExit(f"Over the startup budget of {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
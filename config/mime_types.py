@@ -6,4 +6,70 @@ MIME_EXTENSION_MAP = {
     "image/jpeg": ".jpg",
     "image/png": ".png",
     "text/plain": ".txt",
-}
\ No newline at end of file
+}
+
+HTML_MIME_TYPE = "text/html"
+ZIP_MIME_TYPE = "application/zip"
+
+# Enough of the body to see the magic bytes and the first OOXML zip entries.
+SNIFF_BYTES = 8 * 1024
+
+_OOXML_MARKERS = (
+    (b"word/", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    (b"ppt/", "application/vnd.openxmlformats-officedocument.presentationml.presentation"),
+    (b"xl/", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+)
+_OOXML_TYPES = {mime_type for _, mime_type in _OOXML_MARKERS}
+
+
+def ooxml_type_from_names(names) -> str | None:
+    """Maps zip entry names (bytes or str) to the OOXML type they belong to."""
+    for name in names:
+        if isinstance(name, str):
+            name = name.encode()
+        for marker, mime_type in _OOXML_MARKERS:
+            if name.startswith(marker):
+                return mime_type
+    return None
+
+
+def sniff_mime_type(head: bytes, declared: str = "") -> str | None:
+    """
+    Detects the document type from the first bytes of the body, using the
+    declared Content-Type only when the bytes are not conclusive. Returns
+    None when the content is not something we can process.
+    """
+    declared = declared.split(";")[0].strip().lower()
+
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"PK\x03\x04"):
+        # Local file headers in the head carry the entry names.
+        entries = head.split(b"PK\x03\x04")[1:]
+        names = [entry[26:26 + int.from_bytes(entry[22:24], "little")] for entry in entries if len(entry) >= 26]
+        sniffed = ooxml_type_from_names(names)
+        if sniffed:
+            return sniffed
+        return declared if declared in _OOXML_TYPES else ZIP_MIME_TYPE
+
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith((b"<!doctype html", b"<html")) or (text.startswith(b"<") and b"<html" in text):
+        return HTML_MIME_TYPE
+    if declared == HTML_MIME_TYPE:
+        return HTML_MIME_TYPE
+
+    if declared in MIME_EXTENSION_MAP:
+        return declared
+    if head and b"\x00" not in head:
+        try:
+            # A multi-byte character may be cut at the end of the head.
+            head.decode("utf-8")
+            return "text/plain"
+        except UnicodeDecodeError as e:
+            if e.start >= len(head) - 3:
+                return "text/plain"
+    return None
@@ -13,5 +13,64 @@ class Settings:
     MONGODB_URI: str = os.getenv("MONGODB_URI")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME")
     SERPAPI_API_KEY: str = os.getenv("SERPAPI_API_KEY")
+    DATA_DIR: str = os.getenv("DATA_DIR", "data")
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "local")
+    VECTOR_STORE_DIR: str = os.getenv("VECTOR_STORE_DIR", os.path.join(DATA_DIR, "vectors"))
+    PINECONE_QUERY_CONCURRENCY: int = int(os.getenv("PINECONE_QUERY_CONCURRENCY", "8"))
+    EMBED_MAX_BATCH_SIZE: int = int(os.getenv("EMBED_MAX_BATCH_SIZE", "256"))
+    EMBED_BATCH_WINDOW_MS: float = float(os.getenv("EMBED_BATCH_WINDOW_MS", "15"))
+    EMBED_CACHE_PATH: str = os.getenv("EMBED_CACHE_PATH", os.path.join(DATA_DIR, "embedding_cache.sqlite3"))
+    EMBED_CACHE_MEMORY_ITEMS: int = int(os.getenv("EMBED_CACHE_MEMORY_ITEMS", "4096"))
+    EMBED_CACHE_DISK_ITEMS: int = int(os.getenv("EMBED_CACHE_DISK_ITEMS", "200000"))
+    REGISTRY_RECONCILE_SECONDS: float = float(os.getenv("REGISTRY_RECONCILE_SECONDS", "600"))
+    INGESTION_LEASE_SECONDS: float = float(os.getenv("INGESTION_LEASE_SECONDS", "60"))
+    INGESTION_WAIT_SECONDS: float = float(os.getenv("INGESTION_WAIT_SECONDS", "600"))
+    INGESTION_POLL_SECONDS: float = float(os.getenv("INGESTION_POLL_SECONDS", "1"))
+    HTTP_POOL_SIZE: int = int(os.getenv("HTTP_POOL_SIZE", "100"))
+    DOWNLOAD_TIMEOUT_SECONDS: float = float(os.getenv("DOWNLOAD_TIMEOUT_SECONDS", "120"))
+    MAX_DOWNLOAD_BYTES: int = int(os.getenv("MAX_DOWNLOAD_BYTES", str(200 * 1024 * 1024)))
+    PARSE_WORKERS: int = int(os.getenv("PARSE_WORKERS", "0"))  # 0 = one per CPU
+    PARSE_QUEUE_SIZE: int = int(os.getenv("PARSE_QUEUE_SIZE", "16"))
+    PARSE_TIMEOUT_SECONDS: float = float(os.getenv("PARSE_TIMEOUT_SECONDS", "300"))
+    EMBED_BATCH_MAX_TOKENS: int = int(os.getenv("EMBED_BATCH_MAX_TOKENS", "20000"))
+    EMBED_CONCURRENCY: int = int(os.getenv("EMBED_CONCURRENCY", "4"))
+    UPSERT_CONCURRENCY: int = int(os.getenv("UPSERT_CONCURRENCY", "2"))
+    INGEST_MAX_RETRIES: int = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+    INGEST_RETRY_BASE_SECONDS: float = float(os.getenv("INGEST_RETRY_BASE_SECONDS", "1"))
+    INGEST_RETRY_MAX_SECONDS: float = float(os.getenv("INGEST_RETRY_MAX_SECONDS", "30"))
+    ANSWER_CACHE_MAX_BYTES: int = int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    ANSWER_CACHE_TTL_SECONDS: float = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+    SEMANTIC_CACHE_DIR: str = os.getenv("SEMANTIC_CACHE_DIR", os.path.join(DATA_DIR, "semantic_cache"))
+    BM25_ENABLED: bool = os.getenv("BM25_ENABLED", "true").lower() == "true"
+    HYBRID_DENSE_WEIGHT: float = float(os.getenv("HYBRID_DENSE_WEIGHT", "0.7"))
+    HYBRID_BM25_WEIGHT: float = float(os.getenv("HYBRID_BM25_WEIGHT", "0.3"))
+    HYBRID_CANDIDATE_FACTOR: int = int(os.getenv("HYBRID_CANDIDATE_FACTOR", "3"))
+    BM25_SKIP_EMBED_CONFIDENCE: float = float(os.getenv("BM25_SKIP_EMBED_CONFIDENCE", "1.0"))
+    BM25_SKIP_EMBED_MARGIN: float = float(os.getenv("BM25_SKIP_EMBED_MARGIN", "1.5"))
+    GPT_BATCH_ANSWERS: bool = os.getenv("GPT_BATCH_ANSWERS", "false").lower() == "true"
+    GPT_BATCH_SIZE: int = int(os.getenv("GPT_BATCH_SIZE", "5"))
+    GPT_BATCH_CONTEXT_TOKENS: int = int(os.getenv("GPT_BATCH_CONTEXT_TOKENS", "1500"))
+    CONTEXT_MAX_TOKENS: int = int(os.getenv("CONTEXT_MAX_TOKENS", "800"))
+    CONTEXT_PREAMBLE_TOKENS: int = int(os.getenv("CONTEXT_PREAMBLE_TOKENS", "0"))  # 0 = no shared document preamble
+    GPT_TOOL_MAX_ROUNDS: int = int(os.getenv("GPT_TOOL_MAX_ROUNDS", "2"))
+    GPT_TOOL_TIMEOUT_SECONDS: float = float(os.getenv("GPT_TOOL_TIMEOUT_SECONDS", "15"))
+    TOOL_CACHE_TTL_SECONDS: float = float(os.getenv("TOOL_CACHE_TTL_SECONDS", "3600"))
+    TOOL_CACHE_MAX_ITEMS: int = int(os.getenv("TOOL_CACHE_MAX_ITEMS", "1024"))
+    TOOL_RESULT_MAX_CHARS: int = int(os.getenv("TOOL_RESULT_MAX_CHARS", "4000"))
+    FETCH_CACHE_PATH: str = os.getenv("FETCH_CACHE_PATH", os.path.join(DATA_DIR, "fetch_cache.sqlite3"))
+    FETCH_MAX_BYTES: int = int(os.getenv("FETCH_MAX_BYTES", str(5 * 1024 * 1024)))
+    FETCH_CACHE_MAX_BYTES: int = int(os.getenv("FETCH_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    FETCH_CACHE_FRESH_SECONDS: float = float(os.getenv("FETCH_CACHE_FRESH_SECONDS", "60"))
+    CHUNK_TOKENS: int = int(os.getenv("CHUNK_TOKENS", "128"))
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "24"))
+    PARSE_STREAM_BUFFER: int = int(os.getenv("PARSE_STREAM_BUFFER", "8"))
+    PIPELINE_QUEUE_SIZE: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+    OCR_WORKERS: int = int(os.getenv("OCR_WORKERS", "0"))  # per parse job; 0 = CPUs / PARSE_WORKERS
+    OFFICE_POOL_SIZE: int = int(os.getenv("OFFICE_POOL_SIZE", "1"))  # per parse worker process
+    OFFICE_JOB_TIMEOUT_SECONDS: float = float(os.getenv("OFFICE_JOB_TIMEOUT_SECONDS", "120"))
+    OFFICE_START_TIMEOUT_SECONDS: float = float(os.getenv("OFFICE_START_TIMEOUT_SECONDS", "60"))
+    UNOSERVER_PYTHON: str = os.getenv("UNOSERVER_PYTHON", "/usr/bin/python3")
 
 settings = Settings()
\ No newline at end of file
@@ -5,4 +5,6 @@ client = AsyncIOMotorClient(settings.MONGODB_URI)
 db = client[settings.DATABASE_NAME]
 
 async def init_indexes():
-  await db.documents.create_index("document_url", unique=True)
\ No newline at end of file
+  await db.documents.create_index("document_url", unique=True)
+  await db.documents.create_index("ingestion.content_hash", sparse=True)
+  await db.qa_pairs.create_index([("document_id", 1), ("question_hash", 1)], unique=True)
\ No newline at end of file
@@ -1,13 +1,30 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from api.routes import router as hackrx
 from db.client import init_indexes
+from services.clients import clients
+from services.document_db_service import migrate_embedded_qa_pairs
+from services.ingestion_registry import ingestion_registry
+from services.download_service import close_http_session
+from services.parse_executor import parse_executor
+from config.settings import settings
 
-app = FastAPI()
-
-@app.on_event("startup")
-async def startup_event():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    clients.start()
     await init_indexes()
+    await migrate_embedded_qa_pairs()
+    await ingestion_registry.load()
+    await ingestion_registry.reconcile()
+    ingestion_registry.start_reconciler(settings.REGISTRY_RECONCILE_SECONDS)
+    yield
+    await ingestion_registry.stop_reconciler()
+    await close_http_session()
+    await clients.close()
+    parse_executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(hackrx)
 
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Optional
 from pydantic import BaseModel, Field, HttpUrl, ConfigDict
 from bson import ObjectId
@@ -21,11 +22,25 @@ class QAPair(BaseModel):
     question: str
     answer: str
 
+class IngestionState(BaseModel):
+    status: str = "pending"
+    namespace: Optional[str] = None
+    chunk_count: int = 0
+    committed_chunks: int = 0
+    content_hash: Optional[str] = None
+    error: Optional[str] = None
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 class DocumentModel(BaseModel):
     id: Optional[PyObjectId] = Field(alias="_id")
     document_url: HttpUrl
-    questions: List[str]
-    qa_pairs: List[QAPair]
+    questions: List[str] = []
+    # Legacy inline storage; answers now live in the qa_pairs collection.
+    qa_pairs: List[QAPair] = []
+    ingestion: Optional[IngestionState] = None
 
     model_config = ConfigDict(
         validate_by_name=True,
@@ -0,0 +1,104 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from config.settings import settings
+from services.document_db_service import normalize_question
+
+# Fixed per-entry cost on top of the strings: key tuple, value tuple, dict slot.
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class AnswerCache:
+    """
+    In-process L1 cache of final answers keyed by (document URL, normalised
+    question), checked before MongoDB so repeated questions are answered
+    without any network I/O.
+
+    Entries expire after `ttl_seconds`, and the least recently used ones are
+    evicted once the estimated size passes `max_bytes`. `clear()` is called by
+    clear_qa_caches; other worker processes only see a clear through the TTL.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[str, str], tuple[str, float, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    def _drop(self, key: tuple[str, str]) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get_many(self, document_url: str, questions: list[str]) -> dict[str, str]:
+        """Returns {question: answer} for the questions that have a live entry."""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for question in questions:
+                key = (document_url, normalize_question(question))
+                entry = self._entries.get(key)
+                if entry is None:
+                    self.misses += 1
+                    continue
+                answer, expires_at, _ = entry
+                if expires_at <= now:
+                    self._drop(key)
+                    self.expirations += 1
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                found[question] = answer
+                self.hits += 1
+        return found
+
+    def has_all(self, document_url: str, questions: list[str]) -> bool:
+        """Cheap membership check that does not touch the hit/miss counters or LRU order."""
+        now = time.monotonic()
+        with self._lock:
+            for question in questions:
+                entry = self._entries.get((document_url, normalize_question(question)))
+                if entry is None or entry[1] <= now:
+                    return False
+        return True
+
+    def put_many(self, document_url: str, answers: dict[str, str]) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for question, answer in answers.items():
+                key = (document_url, normalize_question(question))
+                if key in self._entries:
+                    self._drop(key)
+                size = sys.getsizeof(document_url) + sys.getsizeof(key[1]) + sys.getsizeof(answer) + _ENTRY_OVERHEAD_BYTES
+                self._entries[key] = (answer, expires_at, size)
+                self._bytes += size
+
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "items": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+
+answer_cache = AnswerCache(
+    max_bytes=settings.ANSWER_CACHE_MAX_BYTES,
+    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,178 @@
+import os
+import re
+import threading
+from collections import Counter
+from typing import Optional
+import numpy as np
+from config.settings import settings
+
+# Keeps clause numbers such as "4.2.1" together as one token.
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i if in is it its of on or "
+    "that the this to was what when where which who why will with does do can "
+    "under my our your there their".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over one document's chunks, stored as CSR-style arrays:
+
+        terms       sorted vocabulary (term id = position)
+        indptr      postings of term t are [indptr[t], indptr[t + 1])
+        postings    row numbers of the chunks containing the term
+        tfs         term frequency for each posting
+        doc_len     token count per row
+        chunk_ids   chunk index (vector id suffix) of each row
+
+    Saved as a single bm25.npz in the document's vector-store directory, so
+    deleting the namespace removes it too.
+    """
+
+    def __init__(self, terms, indptr, postings, tfs, doc_len, chunk_ids, k1: float = 1.2, b: float = 0.75):
+        self.terms = terms
+        self.indptr = indptr
+        self.postings = postings
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.chunk_ids = chunk_ids
+        self.k1 = k1
+        self.b = b
+        self._term_ids = {term: i for i, term in enumerate(terms.tolist())}
+        self.avg_len = float(doc_len.mean()) if len(doc_len) else 0.0
+        df = np.diff(indptr).astype(np.float32)
+        self.idf = np.log1p((len(doc_len) - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def search(self, query: str, top_k: int) -> tuple[list[tuple[int, float]], float]:
+        """
+        Returns ([(chunk_index, score)] best first, confidence). Confidence is
+        the top score relative to the sum of the query terms' IDFs, i.e. what
+        an average-length chunk containing every query term once would score,
+        so it is comparable across queries of different lengths.
+        """
+        term_ids = [self._term_ids[t] for t in dict.fromkeys(tokenize(query)) if t in self._term_ids]
+        if not term_ids or not len(self) or top_k <= 0:
+            return [], 0.0
+
+        scores = np.zeros(len(self), dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / self.avg_len)
+        for t in term_ids:
+            start, end = self.indptr[t], self.indptr[t + 1]
+            rows, tf = self.postings[start:end], self.tfs[start:end]
+            scores[rows] += self.idf[t] * tf * (self.k1 + 1) / (tf + norm[rows])
+
+        k = min(top_k, len(self))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = [(int(self.chunk_ids[i]), float(scores[i])) for i in top if scores[i] > 0]
+
+        reference = float(self.idf[term_ids].sum())
+        confidence = results[0][1] / reference if results and reference > 0 else 0.0
+        return results, confidence
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            terms=self.terms,
+            indptr=self.indptr,
+            postings=self.postings,
+            tfs=self.tfs,
+            doc_len=self.doc_len,
+            chunk_ids=self.chunk_ids,
+            params=np.array([self.k1, self.b], dtype=np.float32),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as data:
+            k1, b = data["params"].tolist()
+            return cls(
+                data["terms"], data["indptr"], data["postings"], data["tfs"],
+                data["doc_len"], data["chunk_ids"], k1=k1, b=b,
+            )
+
+
+class BM25Builder:
+    """Collects chunks as they stream through ingestion and builds the index at the end."""
+
+    def __init__(self):
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._doc_len: list[int] = []
+        self._chunk_ids: list[int] = []
+
+    def add(self, chunk_index: int, text: str) -> None:
+        row = len(self._doc_len)
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            self._postings.setdefault(term, []).append((row, tf))
+        self._doc_len.append(len(tokens))
+        self._chunk_ids.append(chunk_index)
+
+    def build(self) -> BM25Index:
+        terms = sorted(self._postings)
+        lengths = [len(self._postings[term]) for term in terms]
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+
+        postings = np.empty(indptr[-1], dtype=np.int32)
+        tfs = np.empty(indptr[-1], dtype=np.float32)
+        for t, term in enumerate(terms):
+            entries = self._postings[term]
+            postings[indptr[t]:indptr[t + 1]] = [row for row, _ in entries]
+            tfs[indptr[t]:indptr[t + 1]] = [tf for _, tf in entries]
+
+        return BM25Index(
+            terms=np.array(terms, dtype=str),
+            indptr=indptr,
+            postings=postings,
+            tfs=tfs,
+            doc_len=np.asarray(self._doc_len, dtype=np.float32),
+            chunk_ids=np.asarray(self._chunk_ids, dtype=np.int32),
+        )
+
+
+class BM25Store:
+    """Loads per-namespace indexes from disk on demand and keeps them in memory."""
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self._lock = threading.Lock()
+        self._indexes: dict[str, tuple[int, BM25Index]] = {}
+
+    FILE = "bm25.npz"
+
+    def path(self, namespace: str) -> str:
+        return os.path.join(self.root_dir, namespace, self.FILE)
+
+    def get(self, namespace: str) -> Optional[BM25Index]:
+        path = self.path(namespace)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            cached = self._indexes.get(namespace)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            index = BM25Index.load(path)
+            self._indexes[namespace] = (mtime, index)
+            return index
+
+    def save(self, namespace: str, index: BM25Index) -> None:
+        index.save(self.path(namespace))
+        with self._lock:
+            self._indexes.pop(namespace, None)
+
+
+bm25_store = BM25Store(settings.VECTOR_STORE_DIR)
@@ -0,0 +1,221 @@
+import re
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+from config.settings import settings
+
+# Budgets are expressed in tokens and converted with the same ~4 characters
+# per token estimate used for embedding batches.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text with the OpenAI tokenizers.
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+")
+_WHITESPACE = re.compile(r"\s+")
+_NUMBERED_HEADING = re.compile(
+    r"^(?:(?:section|chapter|part|article|clause|schedule|annexure)\s+)?"
+    r"(?:\d+(?:\.\d+)*|[A-Z]|[IVXLC]+)[.)]?\s+[A-Z][^.!?]{2,80}$",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class DocumentUnit:
+    """A structural piece of parser output: a page, slide, sheet row, heading or paragraph."""
+    text: str
+    page: Optional[int] = None
+    section: Optional[str] = None
+    kind: str = "paragraph"
+
+
+@dataclass
+class Chunk:
+    text: str
+    index: int
+    start: int
+    end: int
+    page: Optional[int] = None
+    section: Optional[str] = None
+    kind: str = "paragraph"
+
+    def metadata(self) -> dict:
+        return {
+            "text": self.text,
+            "chunk_index": self.index,
+            "start": self.start,
+            "end": self.end,
+            "section": self.section or "unknown",
+            "page": self.page if self.page is not None else -1,
+            "source": "",
+            "type": self.kind,
+        }
+
+
+def looks_like_heading(line: str) -> bool:
+    line = line.strip()
+    if not 3 <= len(line) <= 90 or line.endswith((".", ",", ";")):
+        return False
+    if _NUMBERED_HEADING.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 4 and all(c.isupper() for c in letters)
+
+
+def _line_spans(text: str) -> Iterator[tuple[int, int]]:
+    cursor = 0
+    for match in re.finditer("\n", text):
+        yield cursor, match.start()
+        cursor = match.end()
+    yield cursor, len(text)
+
+
+def _split_spans(text: str, start: int, end: int, budget: int) -> Iterator[tuple[int, int]]:
+    """Splits text[start:end] into stripped spans no longer than budget: sentences, then words."""
+    for pattern in (_SENTENCE_END, _WHITESPACE):
+        if end - start <= budget:
+            break
+        pieces = []
+        cursor = start
+        for match in pattern.finditer(text, start, end):
+            pieces.append((cursor, match.start()))
+            cursor = match.end()
+        pieces.append((cursor, end))
+        if len(pieces) > 1:
+            for piece_start, piece_end in pieces:
+                yield from _split_spans(text, piece_start, piece_end, budget)
+            return
+
+    # Strip surrounding whitespace without losing offsets.
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    for cut in range(start, end, budget):
+        yield cut, min(cut + budget, end)
+
+
+class Chunker:
+    """
+    Packs parser units into token-budgeted chunks with offsets and page/section
+    metadata. Text is cut at line, then sentence, then word boundaries, and
+    neighbouring chunks share up to `overlap_tokens` of trailing lines.
+
+    A chunk never spans two pages/slides or two sections, so its metadata is
+    exact. Sections come from the unit (DOCX heading styles, slide titles,
+    sheet names) or from heading-like lines inside the text.
+    """
+
+    def __init__(self, chunk_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None):
+        self.budget = (chunk_tokens or settings.CHUNK_TOKENS) * CHARS_PER_TOKEN
+        self.overlap = (overlap_tokens if overlap_tokens is not None else settings.CHUNK_OVERLAP_TOKENS) * CHARS_PER_TOKEN
+        # Open chunk as (unit_text, start, end, global_offset_of_unit) spans.
+        self._spans: list[tuple[str, int, int, int]] = []
+        self._size = 0
+        self._page: Optional[int] = None
+        self._section: Optional[str] = None
+        self._kind = "paragraph"
+        self._detected_section: Optional[str] = None
+        self._offset = 0
+        self._index = 0
+
+    def _build(self) -> Chunk:
+        parts = []
+        group_text, group_start, group_end = None, 0, 0
+        for unit_text, start, end, _ in self._spans:
+            if unit_text is group_text and start >= group_end:
+                group_end = end
+                continue
+            if group_text is not None:
+                parts.append(group_text[group_start:group_end])
+            group_text, group_start, group_end = unit_text, start, end
+        parts.append(group_text[group_start:group_end])
+
+        first, last = self._spans[0], self._spans[-1]
+        chunk = Chunk(
+            text="\n".join(parts),
+            index=self._index,
+            start=first[3] + first[1],
+            end=last[3] + last[2],
+            page=self._page,
+            section=self._section,
+            kind=self._kind,
+        )
+        self._index += 1
+        return chunk
+
+    def _emit(self, keep_overlap: bool) -> Iterator[Chunk]:
+        if not self._spans:
+            return
+        yield self._build()
+
+        carried: list[tuple[str, int, int, int]] = []
+        if keep_overlap:
+            size = 0
+            for span in reversed(self._spans[1:]):
+                length = span[2] - span[1] + 1
+                if size + length > self.overlap:
+                    break
+                carried.insert(0, span)
+                size += length
+        self._spans = carried
+        self._size = sum(end - start + 1 for _, start, end, _ in carried)
+
+    def _add(self, unit_text: str, start: int, end: int, unit_offset: int) -> Iterator[Chunk]:
+        length = end - start + 1
+        if self._spans and self._size + length > self.budget:
+            yield from self._emit(keep_overlap=True)
+            # Drop overlap that would not leave room for the new span.
+            while self._spans and self._size + length > self.budget:
+                dropped = self._spans.pop(0)
+                self._size -= dropped[2] - dropped[1] + 1
+        self._spans.append((unit_text, start, end, unit_offset))
+        self._size += length
+
+    def feed(self, unit: DocumentUnit) -> Iterator[Chunk]:
+        text = unit.text
+        unit_offset = self._offset
+        self._offset += len(text) + 1
+
+        if unit.kind == "heading":
+            self._detected_section = text.strip()
+        section = unit.section or self._detected_section
+
+        if self._spans and (unit.page != self._page or section != self._section):
+            yield from self._emit(keep_overlap=False)
+        self._page, self._section, self._kind = unit.page, section, unit.kind
+
+        for line_start, line_end in _line_spans(text):
+            yield from self._feed_line(unit, text, line_start, line_end, unit_offset)
+
+    def _feed_line(self, unit: DocumentUnit, text: str, line_start: int, line_end: int, unit_offset: int) -> Iterator[Chunk]:
+        for start, end in _split_spans(text, line_start, line_end, self.budget):
+            if start == end:
+                continue
+            if unit.section is None and unit.kind != "heading" and looks_like_heading(text[start:end]):
+                heading = _WHITESPACE.sub(" ", text[start:end])
+                if heading != self._section:
+                    yield from self._emit(keep_overlap=False)
+                    self._detected_section = self._section = heading
+            yield from self._add(text, start, end, unit_offset)
+
+    def finish(self) -> Iterator[Chunk]:
+        yield from self._emit(keep_overlap=False)
+
+
+def chunk_units(units: Iterable[DocumentUnit], chunk_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> Iterator[Chunk]:
+    chunker = Chunker(chunk_tokens, overlap_tokens)
+    for unit in units:
+        yield from chunker.feed(unit)
+    yield from chunker.finish()
+
+
+async def chunk_units_stream(units: AsyncIterable[DocumentUnit], chunk_tokens: Optional[int] = None, overlap_tokens: Optional[int] = None) -> AsyncIterator[Chunk]:
+    chunker = Chunker(chunk_tokens, overlap_tokens)
+    async for unit in units:
+        for chunk in chunker.feed(unit):
+            yield chunk
+    for chunk in chunker.finish():
+        yield chunk
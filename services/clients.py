@@ -0,0 +1,98 @@
+import os
+from typing import TYPE_CHECKING, Optional
+from config.settings import settings
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+    from services.fetch_cache import FetchCache
+    from services.vector_index import VectorStore
+    from services.vector_store import EmbeddingCache
+
+
+class ClientRegistry:
+    """
+    The one place SDK clients are built. The FastAPI lifespan calls `start()`
+    so they exist before the first request; code running outside the app
+    (parse workers, scripts, benchmarks) gets them built lazily on first use.
+    Importing this module loads no SDK and opens no file.
+
+    The SQLite-backed caches belong to the process that opened them; a
+    forked parse worker that touches one gets its own connection.
+    """
+
+    def __init__(self):
+        self._openai: Optional["AsyncOpenAI"] = None
+        self._vector_index: Optional["VectorStore"] = None
+        self._embedding_cache: Optional["EmbeddingCache"] = None
+        self._fetch_cache: Optional["FetchCache"] = None
+        self._pid = os.getpid()
+
+    def _check_fork(self) -> None:
+        if self._pid != os.getpid():
+            # Never use (or close) a SQLite connection inherited across fork().
+            self._embedding_cache = None
+            self._fetch_cache = None
+            self._pid = os.getpid()
+
+    @property
+    def openai(self) -> "AsyncOpenAI":
+        if self._openai is None:
+            from openai import AsyncOpenAI
+            self._openai = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        return self._openai
+
+    @property
+    def vector_index(self) -> "VectorStore":
+        if self._vector_index is None:
+            from services.vector_index import get_vector_store
+            self._vector_index = get_vector_store()
+        return self._vector_index
+
+    @property
+    def embedding_cache(self) -> "EmbeddingCache":
+        self._check_fork()
+        if self._embedding_cache is None:
+            from services.embedding_service import EMBED_MODEL
+            from services.vector_store import EmbeddingCache
+            self._embedding_cache = EmbeddingCache(
+                path=settings.EMBED_CACHE_PATH,
+                model=EMBED_MODEL,
+                max_memory_items=settings.EMBED_CACHE_MEMORY_ITEMS,
+                max_disk_items=settings.EMBED_CACHE_DISK_ITEMS,
+            )
+        return self._embedding_cache
+
+    @property
+    def fetch_cache(self) -> "FetchCache":
+        self._check_fork()
+        if self._fetch_cache is None:
+            from services.fetch_cache import FetchCache
+            self._fetch_cache = FetchCache(
+                path=settings.FETCH_CACHE_PATH,
+                max_body_bytes=settings.FETCH_MAX_BYTES,
+                max_disk_bytes=settings.FETCH_CACHE_MAX_BYTES,
+                fresh_seconds=settings.FETCH_CACHE_FRESH_SECONDS,
+            )
+        return self._fetch_cache
+
+    def start(self) -> None:
+        self.openai
+        self.vector_index
+        self.embedding_cache
+        self.fetch_cache
+
+    async def close(self) -> None:
+        if self._openai is not None:
+            await self._openai.close()
+            self._openai = None
+        self._vector_index = None
+        self._check_fork()
+        if self._embedding_cache is not None:
+            self._embedding_cache.close()
+            self._embedding_cache = None
+        if self._fetch_cache is not None:
+            self._fetch_cache.close()
+            self._fetch_cache = None
+
+
+clients = ClientRegistry()
@@ -0,0 +1,144 @@
+import asyncio
+import re
+import threading
+from typing import Iterable, Optional, Union
+from config.settings import settings
+from services.chunker import CHARS_PER_TOKEN
+from services.clients import clients
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+")
+
+
+def _merge_lines(first: list[str], second: list[str]) -> list[str]:
+    """Appends `second` to `first`, dropping the lines the chunker carried over as overlap."""
+    for size in range(min(len(first), len(second)), 0, -1):
+        if first[-size:] == second[:size]:
+            return first + second[size:]
+    return first + second
+
+
+def _truncate(text: str, budget_chars: int) -> str:
+    """Cuts text to the budget at the last sentence end, or at a word when there is none."""
+    if len(text) <= budget_chars:
+        return text
+    head = text[:budget_chars]
+    ends = [match.start() for match in _SENTENCE_END.finditer(head)]
+    if ends and ends[-1] > budget_chars // 2:
+        return head[:ends[-1]]
+    return head.rsplit(" ", 1)[0] if " " in head else head
+
+
+def build_context(
+    chunks: Iterable[Union[dict, str]],
+    max_tokens: int,
+    skip_indexes: Iterable[int] = (),
+) -> str:
+    """
+    Assembles retrieved chunks into a context of at most `max_tokens`.
+
+    Chunks are taken best first until the budget runs out (the last one cut
+    at a sentence boundary), then laid out in document order with adjacent
+    and overlapping chunks merged into one block, so the chunker's overlap
+    lines appear only once. Plain strings, which carry no position, are
+    kept in the order given after the positioned blocks.
+    """
+    budget = max_tokens * CHARS_PER_TOKEN
+    skip = set(skip_indexes)
+    seen_texts: set[str] = set()
+    positioned: dict[int, list[str]] = {}
+    loose: list[str] = []
+    used = 0
+
+    for chunk in chunks:
+        if used >= budget:
+            break
+        text = chunk if isinstance(chunk, str) else chunk.get("text", "")
+        index = None if isinstance(chunk, str) else chunk.get("chunk_index")
+        index = int(index) if isinstance(index, (int, float)) and index >= 0 else None
+        text = text.strip()
+        if not text or text in seen_texts or (index is not None and (index in skip or index in positioned)):
+            continue
+        seen_texts.add(text)
+
+        lines = text.split("\n")
+        # Overlap with an already selected neighbour costs nothing extra.
+        neighbour = positioned.get(index - 1) if index is not None else None
+        if neighbour is not None:
+            cost = len("\n".join(_merge_lines(neighbour, lines))) - len("\n".join(neighbour))
+        else:
+            cost = len(text) + 2
+        if used + cost > budget:
+            text = _truncate(text, budget - used - 2)
+            if len(text) < 40:
+                break
+            lines = text.split("\n")
+            cost = len(text) + 2
+        used += cost
+
+        if index is None:
+            loose.append(text)
+        else:
+            positioned[index] = lines
+
+    blocks: list[list[str]] = []
+    previous = None
+    for index in sorted(positioned):
+        if previous is not None and index == previous + 1:
+            blocks[-1] = _merge_lines(blocks[-1], positioned[index])
+        else:
+            blocks.append(list(positioned[index]))
+        previous = index
+
+    return "\n\n".join(["\n".join(block) for block in blocks] + loose)
+
+
+class PreambleCache:
+    """
+    Keeps the opening chunks of each document as a fixed preamble that goes
+    at the top of every prompt for that document. Identical leading tokens
+    across a document's questions let the provider serve them from its
+    prompt cache (OpenAI caches prefixes of 1024 tokens or more).
+    """
+
+    def __init__(self, max_tokens: int):
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._preambles: dict[str, tuple[str, frozenset[int]]] = {}
+
+    def _load(self, namespace: str) -> tuple[str, frozenset[int]]:
+        count = self.max_tokens // max(settings.CHUNK_TOKENS - settings.CHUNK_OVERLAP_TOKENS, 1) + 1
+        ids = [f"{namespace}_{i}" for i in range(count)]
+        found = clients.vector_index.fetch(ids, namespace)
+        chunks = [found[vector_id] for vector_id in ids if vector_id in found]
+        text = build_context(chunks, self.max_tokens)
+        # Only chunks that made it in whole are left out of the per-question context.
+        lines = set(text.split("\n"))
+        included = frozenset(
+            int(chunk["chunk_index"]) for chunk in chunks
+            if "chunk_index" in chunk and set(chunk.get("text", "").strip().split("\n")) <= lines
+        )
+        return text, included
+
+    async def get(self, namespace: str) -> tuple[str, frozenset[int]]:
+        """Returns (preamble text, chunk indexes it covers); empty when disabled."""
+        if self.max_tokens <= 0:
+            return "", frozenset()
+        with self._lock:
+            cached: Optional[tuple[str, frozenset[int]]] = self._preambles.get(namespace)
+        if cached is not None:
+            return cached
+        try:
+            preamble = await asyncio.to_thread(self._load, namespace)
+        except Exception as e:
+            print(f"⚠️ Failed to load the preamble for '{namespace}': {e}")
+            return "", frozenset()
+        with self._lock:
+            self._preambles[namespace] = preamble
+        return preamble
+
+    def clear(self) -> None:
+        with self._lock:
+            self._preambles.clear()
+
+
+preamble_cache = PreambleCache(settings.CONTEXT_PREAMBLE_TOKENS)
@@ -1,10 +1,32 @@
+import hashlib
+from datetime import datetime, timezone
+from pymongo import UpdateOne
 from pymongo.errors import DuplicateKeyError
-from typing import List
+from typing import List, Optional
 from bson import ObjectId
 from models.document_model import DocumentModel, QAPair
 from db.client import db
 
 document_collection = db["documents"]
+qa_collection = db["qa_pairs"]
+
+# document_url -> _id; document ids never change, so they are cached for the process lifetime.
+_document_ids: dict[str, ObjectId] = {}
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+def question_hash(question: str) -> str:
+    return hashlib.sha256(normalize_question(question).encode()).hexdigest()
+
+async def get_document_id(document_url: str) -> Optional[ObjectId]:
+    doc_id = _document_ids.get(document_url)
+    if doc_id is None:
+        document = await document_collection.find_one({"document_url": document_url}, {"_id": 1})
+        if not document:
+            return None
+        doc_id = _document_ids[document_url] = document["_id"]
+    return doc_id
 
 async def create_document(document_data: dict) -> DocumentModel:
     try:
@@ -40,49 +62,74 @@ async def append_questions(document_url: str, new_questions: List[str]) -> Docum
 
     return await get_document_by_url(document_url)
 
-async def append_qa_pairs(document_url: str, new_pairs: List[QAPair]) -> DocumentModel:
-    doc = await get_document_by_url(document_url)
-    if not doc:
-        raise ValueError("Document not found")
-
-    existing_questions_set = {pair.question.strip().lower() for pair in doc.qa_pairs}
-    filtered_pairs = [pair for pair in new_pairs if pair.question.strip().lower() not in existing_questions_set]
-
-    if not filtered_pairs:
-        return doc
-
-    formatted_pairs = [pair.dict() for pair in filtered_pairs]
+async def append_qa_pairs(document_url: str, new_pairs: List[QAPair]) -> int:
+    """
+    Stores every pair from a request with a single unordered bulk_write of
+    upserts keyed on (document_id, question_hash). A question that already
+    has an answer keeps it. Returns the number of newly stored pairs.
+    """
+    if not new_pairs:
+        return 0
 
-    await document_collection.update_one(
-        {"document_url": document_url},
-        {"$push": {"qa_pairs": {"$each": formatted_pairs}}}
-    )
+    doc_id = await get_document_id(document_url)
+    if doc_id is None:
+        raise ValueError("Document not found")
 
-    return await get_document_by_url(document_url)
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"document_id": doc_id, "question_hash": question_hash(pair.question)},
+            {"$setOnInsert": {"question": pair.question, "answer": pair.answer, "created_at": now}},
+            upsert=True,
+        )
+        for pair in new_pairs
+    ]
+    result = await qa_collection.bulk_write(operations, ordered=False)
+    return result.upserted_count
 
 async def find_answers_in_db(document_url: str, questions: List[str]) -> dict[str, str]:
     """
     Given a document URL and a list of questions, return a dict of {question: answer}
-    for any that are found in the document's qa_pairs.
+    for any that already have a stored answer. Only the matching pairs are read.
     """
-    doc = await get_document_by_url(document_url)
-    if not doc:
+    doc_id = await get_document_id(document_url)
+    if doc_id is None or not questions:
         return {}
 
-    normalized_question_map = {q.strip().lower(): q for q in questions}
-    found_answers = {}
+    hash_to_questions: dict[str, list[str]] = {}
+    for question in questions:
+        hash_to_questions.setdefault(question_hash(question), []).append(question)
 
-    existing_qapairs_map = {
-        pair.question.strip().lower(): pair.answer
-        for pair in doc.qa_pairs
-    }
+    cursor = qa_collection.find(
+        {"document_id": doc_id, "question_hash": {"$in": list(hash_to_questions)}},
+        {"_id": 0, "question_hash": 1, "answer": 1}
+    )
 
-    for norm_q, original_q in normalized_question_map.items():
-        if norm_q in existing_qapairs_map:
-            found_answers[original_q] = existing_qapairs_map[norm_q]
+    found_answers = {}
+    async for pair in cursor:
+        for question in hash_to_questions[pair["question_hash"]]:
+            found_answers[question] = pair["answer"]
 
     return found_answers
 
+async def delete_all_qa_pairs() -> int:
+    result = await qa_collection.delete_many({})
+    # Pairs stored inline by older versions.
+    await document_collection.update_many({}, {"$set": {"qa_pairs": [], "questions": []}})
+    return result.deleted_count
+
+async def migrate_embedded_qa_pairs() -> None:
+    """Moves qa_pairs arrays stored inside documents by older versions into the qa_pairs collection."""
+    cursor = document_collection.find({"qa_pairs.0": {"$exists": True}}, {"document_url": 1, "qa_pairs": 1})
+    migrated = 0
+    async for doc in cursor:
+        _document_ids[doc["document_url"]] = doc["_id"]
+        pairs = [QAPair(**pair) for pair in doc["qa_pairs"]]
+        migrated += await append_qa_pairs(doc["document_url"], pairs)
+        await document_collection.update_one({"_id": doc["_id"]}, {"$set": {"qa_pairs": []}})
+    if migrated:
+        print(f"📦 Migrated {migrated} embedded QA pairs into the qa_pairs collection")
+
 async def get_all_documents() -> List[DocumentModel]:
     documents_cursor = document_collection.find({})
     documents = await documents_cursor.to_list(length=None)
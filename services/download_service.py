@@ -0,0 +1,144 @@
+import hashlib
+import os
+import tempfile
+import zipfile
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+import aiohttp
+from config.settings import settings
+from config.mime_types import (
+    HTML_MIME_TYPE,
+    MIME_EXTENSION_MAP,
+    SNIFF_BYTES,
+    ZIP_MIME_TYPE,
+    ooxml_type_from_names,
+    sniff_mime_type,
+)
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+_http_session: Optional[aiohttp.ClientSession] = None
+
+
+class DownloadTooLargeError(Exception):
+    pass
+
+
+class UnsupportedDocumentError(Exception):
+    pass
+
+
+@dataclass
+class DownloadedFile:
+    path: str
+    content_type: str
+    content_hash: str
+    size: int
+    encoding: Optional[str] = None
+
+    def cleanup(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Returns the pooled session shared by every outbound request for the app's lifetime."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=settings.HTTP_POOL_SIZE),
+            timeout=aiohttp.ClientTimeout(total=settings.DOWNLOAD_TIMEOUT_SECONDS),
+        )
+    return _http_session
+
+
+async def close_http_session() -> None:
+    global _http_session
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+    _http_session = None
+
+
+async def download_file_to_temp(file_url: str) -> DownloadedFile:
+    """
+    Fetches the URL once, streaming the body straight to a temp file while
+    hashing it, and aborts as soon as it exceeds MAX_DOWNLOAD_BYTES. The type
+    is sniffed from the first bytes (falling back to Content-Type), so a
+    missing or generic Content-Type does not reject a usable file, and HTML
+    pages come back as a DownloadedFile too instead of needing a second
+    request. The caller owns the temp file; use `downloaded_file` to have it
+    removed automatically.
+    """
+    max_bytes = settings.MAX_DOWNLOAD_BYTES
+
+    async with get_http_session().get(file_url) as response:
+        if response.status != 200:
+            raise Exception(f"Failed to download file. Status: {response.status}")
+
+        declared_type = response.headers.get("Content-Type", "")
+        if response.content_length and response.content_length > max_bytes:
+            raise DownloadTooLargeError(f"File is {response.content_length} bytes, limit is {max_bytes}")
+
+        head = b""
+        while len(head) < SNIFF_BYTES:
+            chunk = await response.content.read(SNIFF_BYTES - len(head))
+            if not chunk:
+                break
+            head += chunk
+
+        content_type = sniff_mime_type(head, declared_type)
+        if content_type is None:
+            raise UnsupportedDocumentError(f"Unsupported or unknown content (Content-Type: {declared_type!r})")
+        ext = MIME_EXTENSION_MAP.get(content_type, ".html" if content_type == HTML_MIME_TYPE else ".zip")
+
+        digest = hashlib.sha256(head)
+        size = len(head)
+        fd, path = tempfile.mkstemp(suffix=ext)
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(head)
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise DownloadTooLargeError(f"File exceeds the {max_bytes} byte limit")
+                    digest.update(chunk)
+                    tmp.write(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+
+        encoding = response.charset
+
+    if content_type == ZIP_MIME_TYPE:
+        # The OOXML parts were not in the first bytes; check the central directory.
+        content_type = _ooxml_type_from_zip(path) or ZIP_MIME_TYPE
+
+    print(f"📥 Downloaded {size} bytes ({content_type}, declared {declared_type!r}) from {file_url}")
+    return DownloadedFile(
+        path=path,
+        content_type=content_type,
+        content_hash=digest.hexdigest(),
+        size=size,
+        encoding=encoding,
+    )
+
+
+def _ooxml_type_from_zip(path: str) -> Optional[str]:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return ooxml_type_from_names(archive.namelist())
+    except zipfile.BadZipFile:
+        return None
+
+
+@asynccontextmanager
+async def downloaded_file(file_url: str, prefetched: Optional[DownloadedFile] = None) -> AsyncIterator[DownloadedFile]:
+    """Downloads the URL, or takes ownership of an already fetched copy, and removes the temp file afterwards."""
+    downloaded = prefetched or await download_file_to_temp(file_url)
+    try:
+        yield downloaded
+    finally:
+        downloaded.cleanup()
@@ -0,0 +1,125 @@
+import asyncio
+from typing import TYPE_CHECKING, Optional
+from config.settings import settings
+from services.chunker import estimate_tokens
+from services.clients import clients
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+EMBED_MODEL = "text-embedding-3-small"
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces embedding requests from every in-flight request into shared
+    batched calls. Texts are queued and flushed once `max_batch_size` texts
+    or `max_batch_tokens` estimated tokens are pending, or `max_wait_ms` has
+    elapsed. A flush is split into requests that respect both limits, and
+    each caller gets back only the vectors for its own texts.
+
+    Without an explicit client it uses the shared one from the client registry.
+    """
+
+    def __init__(
+        self,
+        client: Optional["AsyncOpenAI"],
+        model: str,
+        max_batch_size: int,
+        max_batch_tokens: int,
+        max_wait_ms: float,
+    ):
+        self._client = client
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_wait = max_wait_ms / 1000
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._flush_handle: asyncio.TimerHandle | None = None
+        # The loop only keeps weak references to tasks.
+        self._sending: set[asyncio.Task] = set()
+        self.requests_sent = 0
+        self.texts_embedded = 0
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        return self._client or clients.openai
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.append((text, future))
+            self._pending_tokens += estimate_tokens(text)
+            futures.append(future)
+
+        if len(self._pending) >= self.max_batch_size or self._pending_tokens >= self.max_batch_tokens:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return list(await asyncio.gather(*futures))
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, []
+        self._pending_tokens = 0
+
+        batch, batch_tokens = [], 0
+        for text, future in pending:
+            if future.done():
+                continue
+            tokens = estimate_tokens(text)
+            if batch and (len(batch) >= self.max_batch_size or batch_tokens + tokens > self.max_batch_tokens):
+                self._start_send(batch)
+                batch, batch_tokens = [], 0
+            batch.append((text, future))
+            batch_tokens += tokens
+        if batch:
+            self._start_send(batch)
+
+    def _start_send(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        task = asyncio.create_task(self._send(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        # Identical texts queued by concurrent callers are embedded once.
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            self.requests_sent += 1
+            response = await self.client.embeddings.create(input=unique_texts, model=self.model)
+            vectors = {text: item.embedding for text, item in zip(unique_texts, response.data)}
+            self.texts_embedded += len(unique_texts)
+
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(vectors[text])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def stats(self) -> dict:
+        return {
+            "requests_sent": self.requests_sent,
+            "texts_embedded": self.texts_embedded,
+            "pending": len(self._pending),
+        }
+
+
+embedding_batcher = EmbeddingBatcher(
+    client=None,
+    model=EMBED_MODEL,
+    max_batch_size=settings.EMBED_MAX_BATCH_SIZE,
+    max_batch_tokens=settings.EMBED_BATCH_MAX_TOKENS,
+    max_wait_ms=settings.EMBED_BATCH_WINDOW_MS,
+)
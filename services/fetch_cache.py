@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+from services.download_service import get_http_session
+
+FETCH_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    body: bytes
+    content_type: str
+    encoding: Optional[str]
+    truncated: bool
+
+    def text(self) -> str:
+        return self.body.decode(self.encoding or "utf-8", errors="replace")
+
+
+class FetchCache:
+    """
+    Disk cache of pages fetched by request_fetch_tool, keyed by URL.
+
+    Bodies are stored in SQLite with their ETag/Last-Modified and revalidated
+    with a conditional GET once they are older than `fresh_seconds`, so an
+    unchanged page costs a 304 instead of a download. Reads stop at
+    `max_body_bytes`. Cleaned text is cached by body hash, so an unchanged
+    page is never parsed twice. Once the stored bytes exceed `max_disk_bytes`,
+    the least recently used pages are deleted.
+    """
+
+    def __init__(self, path: str, max_body_bytes: int, max_disk_bytes: int, fresh_seconds: float):
+        self.max_body_bytes = max_body_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.fresh_seconds = fresh_seconds
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, body BLOB NOT NULL, content_type TEXT, encoding TEXT,"
+            " etag TEXT, last_modified TEXT, truncated INTEGER NOT NULL, size INTEGER NOT NULL,"
+            " validated_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cleaned_text ("
+            " body_hash TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages(last_access)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cleaned_text_last_access ON cleaned_text(last_access)")
+        self._conn.commit()
+        self._disk_bytes = self._conn.execute(
+            "SELECT (SELECT COALESCE(SUM(size), 0) FROM pages) + (SELECT COALESCE(SUM(size), 0) FROM cleaned_text)"
+        ).fetchone()[0]
+
+        self.fresh_hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+        self.text_hits = 0
+        self.evictions = 0
+
+    def _get(self, url: str) -> Optional[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT body, content_type, encoding, etag, last_modified, truncated, validated_at"
+                " FROM pages WHERE url = ?",
+                (url,),
+            ).fetchone()
+
+    def _touch(self, url: str, validated: bool) -> None:
+        now = time.time()
+        with self._lock:
+            if validated:
+                self._conn.execute("UPDATE pages SET last_access = ?, validated_at = ? WHERE url = ?", (now, now, url))
+            else:
+                self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        # Called with the lock held. Pages and cleaned text share one byte budget.
+        while self._disk_bytes > self.max_disk_bytes:
+            row = self._conn.execute(
+                "SELECT 'pages', url, size, last_access FROM pages"
+                " UNION ALL SELECT 'cleaned_text', body_hash, size, last_access FROM cleaned_text"
+                " ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self._disk_bytes = 0
+                break
+            table, key, size, _ = row
+            column = "url" if table == "pages" else "body_hash"
+            self._conn.execute(f"DELETE FROM {table} WHERE {column} = ?", (key,))
+            self._disk_bytes -= size
+            self.evictions += 1
+
+    def _put(self, url: str, page: FetchedPage, etag: Optional[str], last_modified: Optional[str]) -> None:
+        if len(page.body) > self.max_disk_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM pages WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, page.body, page.content_type, page.encoding, etag, last_modified,
+                 int(page.truncated), len(page.body), now, now),
+            )
+            self._disk_bytes += len(page.body) - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    async def fetch(self, url: str) -> FetchedPage:
+        """Returns the page, from disk when it is fresh or the server answers 304."""
+        cached = await asyncio.to_thread(self._get, url)
+        if cached is not None:
+            body, content_type, encoding, etag, last_modified, truncated, validated_at = cached
+            page = FetchedPage(url, body, content_type or "", encoding, bool(truncated))
+            if time.time() - validated_at < self.fresh_seconds:
+                self.fresh_hits += 1
+                await asyncio.to_thread(self._touch, url, False)
+                return page
+        else:
+            etag = last_modified = None
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        async with get_http_session().get(url, headers=headers) as response:
+            if response.status == 304 and cached is not None:
+                self.revalidated += 1
+                await asyncio.to_thread(self._touch, url, True)
+                return page
+            if response.status != 200:
+                raise Exception(f"Failed to fetch {url}. Status code: {response.status}")
+
+            body = bytearray()
+            truncated = False
+            async for chunk in response.content.iter_chunked(FETCH_CHUNK_SIZE):
+                body += chunk
+                if len(body) > self.max_body_bytes:
+                    del body[self.max_body_bytes:]
+                    truncated = True
+                    break
+
+            page = FetchedPage(
+                url=url,
+                body=bytes(body),
+                content_type=response.content_type or "",
+                encoding=response.charset,
+                truncated=truncated,
+            )
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        if truncated:
+            print(f"✂️ {url} is larger than {self.max_body_bytes} bytes; keeping the first part only")
+        self.downloads += 1
+        await asyncio.to_thread(self._put, url, page, etag, last_modified)
+        return page
+
+    def _get_text(self, body_hash: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM cleaned_text WHERE body_hash = ?", (body_hash,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE cleaned_text SET last_access = ? WHERE body_hash = ?", (time.time(), body_hash))
+                self._conn.commit()
+            return row[0] if row else None
+
+    def _put_text(self, body_hash: str, text: str) -> None:
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM cleaned_text WHERE body_hash = ?", (body_hash,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cleaned_text VALUES (?, ?, ?, ?)",
+                (body_hash, text, size, time.time()),
+            )
+            self._disk_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    async def cleaned_text(self, html: str, clean: Callable[[str], str]) -> str:
+        """Runs `clean` on the HTML once per distinct body and serves repeats from disk."""
+        body_hash = hashlib.sha256(html.encode("utf-8", errors="replace")).hexdigest()
+        text = await asyncio.to_thread(self._get_text, body_hash)
+        if text is not None:
+            self.text_hits += 1
+            return text
+        text = await asyncio.to_thread(clean, html)
+        await asyncio.to_thread(self._put_text, body_hash, text)
+        return text
+
+    def stats(self) -> dict:
+        return {
+            "fresh_hits": self.fresh_hits,
+            "revalidated": self.revalidated,
+            "downloads": self.downloads,
+            "text_hits": self.text_hits,
+            "evictions": self.evictions,
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
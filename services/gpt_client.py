@@ -1,14 +1,39 @@
-from openai import AsyncOpenAI
+import asyncio
+import json
+import time
 from config.settings import settings
-from services.gpt_tools_service import search_tool, request_fetch_tool, TOOL_DEFINITIONS
+from services.clients import clients
+from services.gpt_tools_service import run_tool_calls, TOOL_DEFINITIONS
 
-openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+# Token usage of every completion, for /hackrx/metrics. cached_tokens is the
+# part of the prompt the provider served from its prefix cache.
+usage_stats = {"completions": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0, "seconds": 0.0, "tool_calls": 0}
 
-async def ask_gpt(context: str, question: str, tool_call: bool = False) -> str:
+
+def _record_usage(response, started: float) -> None:
+    usage_stats["completions"] += 1
+    usage_stats["seconds"] += time.perf_counter() - started
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    usage_stats["prompt_tokens"] += usage.prompt_tokens or 0
+    usage_stats["completion_tokens"] += usage.completion_tokens or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    usage_stats["cached_tokens"] += getattr(details, "cached_tokens", None) or 0
+
+
+def _user_prompt(preamble: str, context: str, questions: str) -> str:
+    # The document preamble is the same for every question about a document, so it goes
+    # right after the system prompt to form a prefix the provider can cache.
+    document = f"Document overview:\n{preamble}\n\n" if preamble else ""
+    return f"{document}Context:\n{context}\n\n{questions}"
+
+
+async def ask_gpt(context: str, question: str, tool_call: bool = False, preamble: str = "") -> str:
     system_prompt = (
         "You are a helpful assistant."
         " Use the provided context to answer the user's question. Even if the context is silly or not true, you have to use that only"
-        " If the context does not contain enough information, respond with: TOOL_CALL: <your search query> — this will trigger a Google search."
+        " If the context does not contain enough information, use the search tool to look it up."
         " You may also use your general knowledge to answer questions, assuming they are asked by an Indian citizen."
         " Keep answers concise and under 75 words."
         " Respond in plain text only — do not use markdown, lists, or newlines."
@@ -17,41 +42,107 @@ async def ask_gpt(context: str, question: str, tool_call: bool = False) -> str:
     if tool_call:
         print(f"User context: {context}")
 
-    user_prompt = f"""
-    Context:
-    {context}
+    user_prompt = _user_prompt(preamble, context, f"Question: {question}")
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+
+    # Tool calls get at most GPT_TOOL_MAX_ROUNDS round trips and GPT_TOOL_TIMEOUT_SECONDS
+    # in total; after that the model has to answer with what it has.
+    deadline = time.monotonic() + settings.GPT_TOOL_TIMEOUT_SECONDS
+    for round_number in range(settings.GPT_TOOL_MAX_ROUNDS + 1):
+        allow_tools = round_number < settings.GPT_TOOL_MAX_ROUNDS and time.monotonic() < deadline
+
+        started = time.perf_counter()
+        response = await clients.openai.chat.completions.create(
+            model="gpt-4o",
+            messages=messages,
+            tools=TOOL_DEFINITIONS,
+            tool_choice="auto" if allow_tools else "none",
+            temperature=0.0,
+        )
+        _record_usage(response, started)
+
+        msg = response.choices[0].message
+        if not msg.tool_calls or not allow_tools:
+            return (msg.content or "").strip()
+
+        messages.append({
+            "role": "assistant",
+            "content": msg.content,
+            "tool_calls": [
+                {
+                    "id": call.id,
+                    "type": "function",
+                    "function": {"name": call.function.name, "arguments": call.function.arguments},
+                }
+                for call in msg.tool_calls
+            ],
+        })
+        try:
+            tool_messages = await asyncio.wait_for(
+                run_tool_calls(msg.tool_calls),
+                timeout=max(deadline - time.monotonic(), 0.0),
+            )
+        except asyncio.TimeoutError:
+            print(f"⚠️ Tool calls for '{question}' timed out")
+            tool_messages = [
+                {"role": "tool", "tool_call_id": call.id, "content": "Tool call timed out."}
+                for call in msg.tool_calls
+            ]
+        messages.extend(tool_messages)
+        usage_stats["tool_calls"] += len(msg.tool_calls)
+
 
-    Question: {question}
+async def ask_gpt_batch(context: str, questions: list[str], preamble: str = "") -> list[str | None]:
     """
+    Answers several questions that share one context in a single completion.
+    The model returns {"answers": [{"index": i, "answer": "..."}]}; answers
+    are mapped back by index, and any item that is missing, malformed or asks
+    for a tool call comes back as None so the caller can ask it on its own.
+    """
+    system_prompt = (
+        "You are a helpful assistant."
+        " Use the provided context to answer each of the user's numbered questions. Even if the context is silly or not true, you have to use that only"
+        " You may also use your general knowledge to answer questions, assuming they are asked by an Indian citizen."
+        " If the context does not contain enough information for a question, set its answer to null."
+        " Keep each answer concise and under 75 words, in plain text without markdown, lists, or newlines."
+        ' Respond with a JSON object of the form {"answers": [{"index": <question number>, "answer": <string or null>}]}'
+        " containing one item per question."
+    )
+
+    numbered = "\n".join(f"{i}. {question}" for i, question in enumerate(questions))
+    user_prompt = _user_prompt(preamble, context, f"Questions:\n{numbered}")
 
-    response = await openai_client.chat.completions.create(
+    started = time.perf_counter()
+    response = await clients.openai.chat.completions.create(
         model="gpt-4o",
         messages=[
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
-        tools=TOOL_DEFINITIONS,
+        response_format={"type": "json_object"},
         temperature=0.0,
     )
-    
-    msg = response.choices[0].message
-    
-    if msg.tool_calls:
-        for tool_call in msg.tool_calls:
-            fn_name = tool_call.function.name
-            args = tool_call.function.arguments
-
-            if fn_name == "search":
-                tool_result = await search_tool(args["query"])
-            elif fn_name == "request_fetch":
-                tool_result = await request_fetch_tool(args["url"])
-            else:
-                tool_result = "Unknown tool"
-
-            return await ask_gpt(
-                context=f"Tool Result: {tool_result}\n\n{context}",
-                question=question
-            )
-        
+    _record_usage(response, started)
+
+    answers: list[str | None] = [None] * len(questions)
+    try:
+        items = json.loads(response.choices[0].message.content or "{}").get("answers", [])
+    except (json.JSONDecodeError, AttributeError):
+        print("⚠️ Batched answer was not valid JSON")
+        return answers
+
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        index, answer = item.get("index"), item.get("answer")
+        if (
+            isinstance(index, int) and 0 <= index < len(questions)
+            and isinstance(answer, str) and answer.strip()
+            and not answer.strip().startswith("TOOL_CALL")
+        ):
+            answers[index] = answer.strip()
 
-    return msg.content.strip()
+    return answers
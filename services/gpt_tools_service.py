@@ -1,15 +1,116 @@
-import aiohttp
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from config.settings import settings
+from config.mime_types import HTML_MIME_TYPE
+from services.clients import clients
+from services.parser.html_parser import html_to_text
 from services.search_api import serper_search
 
 async def search_tool(query: str) -> str:
   """Uses Serper API to search the Web"""
-  return serper_search(query)
+  return await serper_search(query)
 
 async def request_fetch_tool(url: str) -> str:
-  """Fetch the raw content of given url via GET request"""
-  async with aiohttp.ClientSession() as session:
-    async with session.get(url) as response:
-      return await response.text()
+  """Fetch the content of given url via GET request, as plain text for HTML pages"""
+  fetch_cache = clients.fetch_cache
+  page = await fetch_cache.fetch(url)
+  text = page.text()
+  if page.content_type == HTML_MIME_TYPE:
+    text = await fetch_cache.cleaned_text(text, html_to_text)
+  return text[:settings.TOOL_RESULT_MAX_CHARS]
+
+TOOLS = {
+  "search": (search_tool, "query"),
+  "request_fetch": (request_fetch_tool, "url"),
+}
+
+# Only free-text arguments are case- and whitespace-folded for the cache key; URLs stay byte-exact.
+_FREE_TEXT_ARGUMENTS = {"query"}
+
+
+class ToolResultCache:
+  """TTL + LRU cache of tool results keyed by (tool name, arguments with free text normalised)."""
+
+  def __init__(self, max_items: int, ttl_seconds: float):
+    self.max_items = max_items
+    self.ttl_seconds = ttl_seconds
+    self._entries: OrderedDict[tuple[str, str], tuple[str, float]] = OrderedDict()
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+
+  @staticmethod
+  def key(name: str, args: dict) -> tuple[str, str]:
+    normalized = {
+      k: " ".join(v.split()).lower() if k in _FREE_TEXT_ARGUMENTS and isinstance(v, str) else v
+      for k, v in args.items()
+    }
+    return name, json.dumps(normalized, sort_keys=True)
+
+  def get(self, key: tuple[str, str]):
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None or entry[1] <= time.monotonic():
+        self._entries.pop(key, None)
+        self.misses += 1
+        return None
+      self._entries.move_to_end(key)
+      self.hits += 1
+      return entry[0]
+
+  def put(self, key: tuple[str, str], result: str) -> None:
+    with self._lock:
+      self._entries[key] = (result, time.monotonic() + self.ttl_seconds)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_items:
+        self._entries.popitem(last=False)
+
+  def stats(self) -> dict:
+    return {"hits": self.hits, "misses": self.misses, "items": len(self._entries)}
+
+
+tool_cache = ToolResultCache(settings.TOOL_CACHE_MAX_ITEMS, settings.TOOL_CACHE_TTL_SECONDS)
+_in_flight: dict[tuple[str, str], asyncio.Future] = {}
+
+async def run_tool(name: str, raw_arguments: str) -> str:
+  """Runs one tool call from the model; failures come back as text so the model can carry on."""
+  if name not in TOOLS:
+    return f"Unknown tool: {name}"
+  tool, argument = TOOLS[name]
+  try:
+    args = json.loads(raw_arguments or "{}")
+  except json.JSONDecodeError:
+    return f"Invalid arguments for {name}: {raw_arguments}"
+  if not isinstance(args, dict) or not isinstance(args.get(argument), str) or not args[argument].strip():
+    return f"Missing '{argument}' argument for {name}"
+
+  key = ToolResultCache.key(name, args)
+  cached = tool_cache.get(key)
+  if cached is not None:
+    return cached
+  # Identical calls made at the same time (e.g. by concurrent questions) share one request.
+  task = _in_flight.get(key)
+  if task is None:
+    task = _in_flight[key] = asyncio.ensure_future(tool(args[argument]))
+    task.add_done_callback(lambda _: _in_flight.pop(key, None))
+  try:
+    result = await asyncio.shield(task)
+  except Exception as e:
+    print(f"⚠️ Tool {name} failed: {e}")
+    return f"Tool {name} failed: {e}"
+  tool_cache.put(key, result)
+  return result
+
+async def run_tool_calls(tool_calls) -> list[dict]:
+  """Runs every tool call of one assistant turn concurrently and returns the `tool` messages to send back."""
+  results = await asyncio.gather(*(run_tool(call.function.name, call.function.arguments) for call in tool_calls))
+  return [
+    {"role": "tool", "tool_call_id": call.id, "content": result}
+    for call, result in zip(tool_calls, results)
+  ]
     
 TOOL_DEFINITIONS = [
     {
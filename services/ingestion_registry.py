@@ -0,0 +1,195 @@
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from pymongo import ReturnDocument
+from models.document_model import IngestionState
+from services.document_db_service import document_collection
+from services.clients import clients
+
+INGESTION_PENDING = "pending"
+INGESTION_INGESTING = "ingesting"
+INGESTION_READY = "ready"
+INGESTION_FAILED = "failed"
+
+
+def generate_namespace_from_url(url: str) -> str:
+    return re.sub(r'\W+', '_', url).strip('_').lower()
+
+
+class IngestionRegistry:
+    """
+    Tracks per-document ingestion state in the `documents` collection with an
+    in-process cache in front of it, so checking whether a document is ready
+    is a dictionary lookup instead of a describe_index_stats() call. The
+    vector index is only consulted by `reconcile`, which runs periodically.
+    """
+
+    def __init__(self):
+        self._states: dict[str, IngestionState] = {}
+        self._reconcile_task: Optional[asyncio.Task] = None
+
+    async def load(self) -> None:
+        cursor = document_collection.find(
+            {"ingestion": {"$exists": True}},
+            {"document_url": 1, "ingestion": 1}
+        )
+        async for doc in cursor:
+            self._states[doc["document_url"]] = IngestionState(**doc["ingestion"])
+        print(f"📒 Loaded ingestion state for {len(self._states)} documents")
+
+    async def get(self, document_url: str) -> Optional[IngestionState]:
+        state = self._states.get(document_url)
+        if state and state.status == INGESTION_READY:
+            return state
+
+        # Not ready locally: another worker may have finished ingesting it.
+        doc = await document_collection.find_one({"document_url": document_url}, {"ingestion": 1})
+        if doc and doc.get("ingestion"):
+            state = IngestionState(**doc["ingestion"])
+            self._states[document_url] = state
+        return state
+
+    def is_ready(self, document_url: str) -> bool:
+        state = self._states.get(document_url)
+        return bool(state and state.status == INGESTION_READY)
+
+    async def set_state(self, document_url: str, status: str, **fields) -> IngestionState:
+        now = datetime.now(timezone.utc)
+        previous = self._states.get(document_url)
+        state = IngestionState(
+            **{
+                **(previous.model_dump() if previous else {}),
+                **fields,
+                "status": status,
+                "created_at": previous.created_at if previous and previous.created_at else now,
+                "updated_at": now,
+            }
+        )
+        if status != INGESTION_FAILED:
+            state.error = None
+        if status != INGESTION_INGESTING:
+            state.lease_owner = None
+            state.lease_expires_at = None
+
+        await document_collection.update_one(
+            {"document_url": document_url},
+            {"$set": {"ingestion": state.model_dump()}}
+        )
+        self._states[document_url] = state
+        return state
+
+    async def record_progress(self, document_url: str, content_hash: str, committed_chunks: int) -> None:
+        """Persists how many leading chunks are safely upserted, so an interrupted ingestion can resume."""
+        await document_collection.update_one(
+            {"document_url": document_url},
+            {"$set": {
+                "ingestion.content_hash": content_hash,
+                "ingestion.committed_chunks": committed_chunks,
+                "ingestion.updated_at": datetime.now(timezone.utc),
+            }}
+        )
+        state = self._states.get(document_url)
+        if state:
+            state.content_hash = content_hash
+            state.committed_chunks = committed_chunks
+
+    async def find_ready_by_content_hash(self, content_hash: str) -> Optional[IngestionState]:
+        doc = await document_collection.find_one(
+            {"ingestion.content_hash": content_hash, "ingestion.status": INGESTION_READY},
+            {"ingestion": 1}
+        )
+        return IngestionState(**doc["ingestion"]) if doc else None
+
+    async def acquire_lease(self, document_url: str, namespace: str, owner: str, ttl_seconds: float) -> bool:
+        """
+        Atomically claims the right to ingest a document across workers. The
+        claim succeeds when nobody is ingesting it, or when the previous
+        owner's lease has expired (e.g. the worker crashed mid-ingestion).
+        """
+        now = datetime.now(timezone.utc)
+        result = await document_collection.find_one_and_update(
+            {
+                "document_url": document_url,
+                "$or": [
+                    {"ingestion.status": {"$nin": [INGESTION_INGESTING, INGESTION_READY]}},
+                    {"ingestion.status": INGESTION_INGESTING, "ingestion.lease_expires_at": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {
+                    "ingestion.status": INGESTION_INGESTING,
+                    "ingestion.namespace": namespace,
+                    "ingestion.lease_owner": owner,
+                    "ingestion.lease_expires_at": now + timedelta(seconds=ttl_seconds),
+                    "ingestion.updated_at": now,
+                    "ingestion.error": None,
+                },
+                "$min": {"ingestion.created_at": now},
+            },
+            projection={"ingestion": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not result:
+            return False
+
+        self._states[document_url] = IngestionState(**result["ingestion"])
+        return True
+
+    async def renew_lease(self, document_url: str, owner: str, ttl_seconds: float) -> bool:
+        now = datetime.now(timezone.utc)
+        result = await document_collection.update_one(
+            {"document_url": document_url, "ingestion.lease_owner": owner},
+            {"$set": {"ingestion.lease_expires_at": now + timedelta(seconds=ttl_seconds)}}
+        )
+        return result.modified_count == 1
+
+    async def reconcile(self) -> None:
+        """Aligns recorded states with the namespaces actually present in the vector index."""
+        namespaces = await asyncio.to_thread(clients.vector_index.list_namespaces)
+
+        cursor = document_collection.find({}, {"document_url": 1, "ingestion": 1})
+        async for doc in cursor:
+            document_url = doc["document_url"]
+            state = IngestionState(**doc["ingestion"]) if doc.get("ingestion") else None
+            namespace = state.namespace if state and state.namespace else generate_namespace_from_url(document_url)
+
+            if state is None and namespace in namespaces:
+                # Ingested before the registry existed.
+                print(f"📒 Registering existing namespace '{namespace}' as ready")
+                await self.set_state(document_url, INGESTION_READY, namespace=namespace)
+            elif state and state.status == INGESTION_READY and namespace not in namespaces:
+                print(f"⚠️ Namespace '{namespace}' is missing from the vector index, marking for re-ingestion")
+                await self.set_state(document_url, INGESTION_PENDING, namespace=namespace, chunk_count=0)
+            elif state:
+                self._states[document_url] = state
+
+    async def _reconcile_periodically(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"⚠️ Ingestion registry reconciliation failed: {e}")
+
+    def start_reconciler(self, interval_seconds: float) -> None:
+        if self._reconcile_task is None and interval_seconds > 0:
+            self._reconcile_task = asyncio.create_task(self._reconcile_periodically(interval_seconds))
+
+    async def stop_reconciler(self) -> None:
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+            try:
+                await self._reconcile_task
+            except asyncio.CancelledError:
+                pass
+            self._reconcile_task = None
+
+    def stats(self) -> dict:
+        counts: dict[str, int] = {}
+        for state in self._states.values():
+            counts[state.status] = counts.get(state.status, 0) + 1
+        return counts
+
+
+ingestion_registry = IngestionRegistry()
@@ -0,0 +1,262 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, Optional
+from config.settings import settings
+
+# Items are shipped between processes in batches of roughly this many characters.
+STREAM_BATCH_CHARS = 16 * 1024
+_STREAM_END = "__stream_end__"
+
+
+class ParseQueueFullError(Exception):
+    pass
+
+
+class ParseTimeoutError(Exception):
+    pass
+
+
+def _put_unless_cancelled(output, cancel, item) -> bool:
+    """Blocks while the queue is full; returns False once the consumer has gone away."""
+    while not cancel.is_set():
+        try:
+            output.put(item, True, 0.5)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _stream_into_queue(fn: Callable, args: tuple, output, cancel, batch_chars: int) -> None:
+    """
+    Runs in a pool worker: drains the generator into the shared queue in
+    batches, and stops at the next item once `cancel` is set.
+    """
+    items = fn(*args)
+    try:
+        batch, size = [], 0
+        for item in items:
+            if cancel.is_set():
+                return
+            batch.append(item)
+            size += len(getattr(item, "text", item))
+            if size >= batch_chars:
+                if not _put_unless_cancelled(output, cancel, batch):
+                    return
+                batch, size = [], 0
+        if batch and not _put_unless_cancelled(output, cancel, batch):
+            return
+        _put_unless_cancelled(output, cancel, _STREAM_END)
+    finally:
+        close = getattr(items, "close", None)
+        if close is not None:
+            close()
+
+
+class ParseExecutor:
+    """
+    Runs CPU-bound document parsing in a process pool so pdfplumber, OCR and
+    the Office parsers never block the event loop.
+
+    At most `max_workers` jobs run at once and at most `max_queue` more wait
+    for a slot; beyond that `submit` fails fast with ParseQueueFullError.
+    A job that exceeds its timeout, or whose caller is cancelled, is aborted
+    by recycling the pool, because a running process-pool task cannot be
+    interrupted in place.
+
+    `stream` runs a generator-based parser and yields its items as they are
+    produced, through a bounded queue so a slow consumer holds the parser back.
+    Its timeout applies to the time spent waiting for the next batch, not to
+    the whole job, so a large document with a slow consumer is not aborted.
+    A stream that times out or loses its consumer is stopped through a
+    cancel event the worker checks between items, never by recycling the
+    pool, so other documents parsing alongside it are unaffected. A stream
+    is never resubmitted after a pool recycle, since the parser would start
+    over and repeat the units already delivered.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, timeout_seconds: float):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout_seconds = timeout_seconds
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._generation = 0
+        self._manager = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._abandoned: set[asyncio.Task] = set()
+        self._queued = 0
+        self._running = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.last_duration = 0.0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def _recycle_pool(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        self._generation += 1
+        # Kill the workers outright; shutdown() alone would wait for the stuck job.
+        # Other jobs on this pool fail with BrokenProcessPool and are resubmitted (streams just fail).
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False)
+
+    async def submit(
+        self,
+        fn: Callable,
+        *args: Any,
+        timeout: Optional[float] = None,
+        resubmit: bool = True,
+        started: Optional[asyncio.Event] = None,
+    ) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        if self._queued >= self.max_queue:
+            raise ParseQueueFullError(f"Parse queue is full ({self._queued} jobs waiting)")
+
+        self._queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+
+        self._running += 1
+        if started is not None:
+            started.set()
+        started_at = time.perf_counter()
+        try:
+            result = await self._run(fn, args, timeout, resubmit)
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise ParseTimeoutError(f"Parsing exceeded {timeout or self.timeout_seconds}s")
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            duration = time.perf_counter() - started_at
+            self.last_duration = duration
+            self.total_duration += duration
+            self.max_duration = max(self.max_duration, duration)
+            self._running -= 1
+            self._slots.release()
+
+    async def _run(self, fn: Callable, args: tuple, timeout: Optional[float], resubmit: bool) -> Any:
+        """Runs one job; `timeout` of 0 means the caller enforces its own (see `stream`)."""
+        loop = asyncio.get_running_loop()
+        if timeout is None:
+            timeout = self.timeout_seconds
+        deadline = loop.time() + timeout if timeout else None
+
+        for attempt in range(2):
+            generation = self._generation
+            future = loop.run_in_executor(self._get_pool(), fn, *args)
+            try:
+                return await asyncio.wait_for(future, max(deadline - loop.time(), 0) if deadline else None)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._recycle_pool()
+                raise
+            except BrokenProcessPool:
+                if generation == self._generation:
+                    # The pool died under this job (e.g. a worker crashed), not a recycle.
+                    self._recycle_pool()
+                    raise
+                if attempt == 1 or not resubmit:
+                    raise
+                print("♻️ Parse pool was recycled by another job, resubmitting")
+
+    async def stream(self, fn: Callable, *args: Any, timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+        output = self._manager.Queue(maxsize=settings.PARSE_STREAM_BUFFER)
+        cancel = self._manager.Event()
+        idle_timeout = timeout or self.timeout_seconds
+        loop = asyncio.get_running_loop()
+
+        started = asyncio.Event()
+        job = asyncio.create_task(
+            self.submit(
+                _stream_into_queue, fn, args, output, cancel, STREAM_BATCH_CHARS,
+                timeout=0, resubmit=False, started=started,
+            )
+        )
+        try:
+            while True:
+                # Only time spent waiting on a running parser counts, not the consumer's own work.
+                waiting_since = loop.time()
+                while True:
+                    try:
+                        batch = await asyncio.to_thread(output.get, True, 0.5)
+                        break
+                    except queue.Empty:
+                        if job.done() and job.exception():
+                            raise job.exception()
+                        if not started.is_set():
+                            waiting_since = loop.time()
+                        elif loop.time() - waiting_since > idle_timeout:
+                            self.timed_out += 1
+                            raise ParseTimeoutError(f"Parser produced nothing for {idle_timeout}s")
+
+                if batch == _STREAM_END:
+                    break
+                for item in batch:
+                    yield item
+
+            await job
+        finally:
+            if not job.done():
+                # The consumer stopped early or the parser went idle. Cancelling the job
+                # would recycle the pool under every other stream, so ask the worker to
+                # stop instead; its slot is released once it notices.
+                cancel.set()
+                self._abandoned.add(job)
+                job.add_done_callback(self._forget)
+
+    def _forget(self, job: asyncio.Task) -> None:
+        self._abandoned.discard(job)
+        if not job.cancelled() and job.exception() is not None:
+            print(f"⚠️ Abandoned parse stream ended with an error: {job.exception()}")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def stats(self) -> dict:
+        finished = self.completed + self.failed + self.timed_out
+        return {
+            "queue_depth": self._queued,
+            "running": self._running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "avg_duration_seconds": self.total_duration / finished if finished else 0.0,
+            "max_duration_seconds": self.max_duration,
+            "last_duration_seconds": self.last_duration,
+        }
+
+
+parse_executor = ParseExecutor(
+    max_workers=settings.PARSE_WORKERS or os.cpu_count() or 1,
+    max_queue=settings.PARSE_QUEUE_SIZE,
+    timeout_seconds=settings.PARSE_TIMEOUT_SECONDS,
+)
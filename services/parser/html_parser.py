@@ -0,0 +1,129 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, Optional
+from services.chunker import DocumentUnit
+
+READ_SIZE = 64 * 1024
+# Browsers look for <meta charset> within the first 1024 bytes; allow a little more.
+SNIFF_SIZE = 4 * 1024
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9._:-]+)""", re.IGNORECASE)
+
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head", "iframe", "object"}
+_BLOCK_TAGS = {
+  "address", "article", "aside", "blockquote", "br", "caption", "dd", "details", "div", "dl", "dt",
+  "fieldset", "figcaption", "figure", "footer", "form", "header", "hr", "li", "main", "nav", "ol",
+  "p", "pre", "section", "summary", "table", "tbody", "td", "tfoot", "th", "thead", "tr", "ul",
+}
+_HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6", "title"}
+
+
+class _TextExtractor(HTMLParser):
+  """
+  Collects the page's text nodes in document order, starting a new unit at
+  every block or heading boundary. Text is taken from the nodes themselves,
+  never from a container's get_text(), so nested blocks are not repeated.
+  """
+
+  def __init__(self):
+    super().__init__(convert_charrefs=True)
+    self.units: list[DocumentUnit] = []
+    self._parts: list[str] = []
+    self._skip_depth = 0
+    self._heading_depth = 0
+    self._in_title = False
+
+  def _flush(self) -> None:
+    text = " ".join("".join(self._parts).split())
+    self._parts = []
+    if text:
+      self.units.append(DocumentUnit(text=text, kind="heading" if self._heading_depth else "paragraph"))
+
+  def handle_starttag(self, tag, attrs):
+    if tag in _SKIP_TAGS:
+      self._skip_depth += 1
+    elif tag == "title":
+      self._in_title = True
+    elif tag == "body":
+      # </head> is optional.
+      self._skip_depth = 0
+    if tag in _BLOCK_TAGS or tag in _HEADING_TAGS:
+      self._flush()
+      if tag in _HEADING_TAGS:
+        self._heading_depth += 1
+
+  def handle_endtag(self, tag):
+    if tag in _SKIP_TAGS and self._skip_depth:
+      self._skip_depth -= 1
+    if tag in _BLOCK_TAGS or tag in _HEADING_TAGS:
+      self._flush()
+      if tag in _HEADING_TAGS and self._heading_depth:
+        self._heading_depth -= 1
+    if tag == "title":
+      self._in_title = False
+
+  def handle_startendtag(self, tag, attrs):
+    if tag in _BLOCK_TAGS:
+      self._flush()
+
+  def handle_data(self, data):
+    # <title> sits in <head> but is worth keeping.
+    if self._skip_depth and not self._in_title:
+      return
+    self._parts.append(data)
+
+  def close(self):
+    super().close()
+    self._flush()
+
+
+def iter_units_from_html(pieces: Iterable[str]) -> Iterator[DocumentUnit]:
+  """Feeds HTML text piece by piece and yields units as soon as they are complete."""
+  parser = _TextExtractor()
+  for piece in pieces:
+    parser.feed(piece)
+    if parser.units:
+      yield from parser.units
+      parser.units = []
+  parser.close()
+  yield from parser.units
+
+
+def _known_encoding(name: Optional[str]) -> Optional[str]:
+  if not name:
+    return None
+  try:
+    return codecs.lookup(name).name
+  except LookupError:
+    return None
+
+
+def detect_html_encoding(html_path: str, declared: Optional[str] = None) -> str:
+  """The charset from the HTTP header, else the page's <meta charset>, else UTF-8."""
+  with open(html_path, "rb") as f:
+    head = f.read(SNIFF_SIZE)
+  if head.startswith(codecs.BOM_UTF8):
+    return "utf-8-sig"
+  match = _META_CHARSET.search(head)
+  meta = match.group(1).decode("ascii") if match else None
+  return _known_encoding(declared) or _known_encoding(meta) or "utf-8"
+
+
+def iter_text_from_html(html_path: str, encoding: Optional[str] = None) -> Iterator[DocumentUnit]:
+  encoding = detect_html_encoding(html_path, encoding)
+  with open(html_path, "r", encoding=encoding, errors="replace") as f:
+    yield from iter_units_from_html(iter(lambda: f.read(READ_SIZE), ""))
+
+
+def html_to_text(html: str) -> str:
+  return "\n".join(unit.text for unit in iter_units_from_html([html]))
+
+
+def extract_text_from_html(html_path: str, encoding: Optional[str] = None) -> list[str]:
+  chunks = [unit.text for unit in iter_text_from_html(html_path, encoding)]
+
+  print(f"🌐 Extracted {len(chunks)} chunks from HTML")
+  print(f"🔍 First chunk (100 chars): {repr(chunks[0][:100]) if chunks else 'No chunks'}")
+
+  return chunks
@@ -1,9 +1,19 @@
+from typing import Iterator
 from PIL import Image
 import pytesseract
+from services.chunker import DocumentUnit
 
-def extract_text_from_image(image_path: str) -> list[str]:
+def _ocr_image(image_path: str) -> str:
     image = Image.open(image_path)
-    text = pytesseract.image_to_string(image)
+    return pytesseract.image_to_string(image)
+
+def iter_text_from_image(image_path: str) -> Iterator[DocumentUnit]:
+    text = _ocr_image(image_path)
+    if text.strip():
+        yield DocumentUnit(text=text, page=1, kind="page")
+
+def extract_text_from_image(image_path: str) -> list[str]:
+    text = _ocr_image(image_path)
     
     print(f"🖼️ Extracted text from image: {text[:100]}...")  # Log first 100 chars for debugging
 
@@ -0,0 +1,49 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pdf2image import convert_from_path
+import pytesseract
+from config.settings import settings
+
+# Pages are already OCR'd in parallel; stop each tesseract from also spawning
+# one OpenMP thread per core and oversubscribing the CPU.
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+
+def ocr_workers() -> int:
+    """
+    OCR threads per parse job. Every parse worker process runs its own pool,
+    so by default the CPUs are split between the parse workers instead of
+    each one starting a thread per CPU.
+    """
+    if settings.OCR_WORKERS:
+        return settings.OCR_WORKERS
+    cpus = os.cpu_count() or 1
+    return max(cpus // (settings.PARSE_WORKERS or cpus), 1)
+
+
+def ocr_pdf_page(pdf_path: str, page_index: int, dpi: int = 300) -> str:
+    """Rasterises a single page (0-based) and OCRs it, so only one page image is held in memory."""
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_index + 1, last_page=page_index + 1)
+    try:
+        return pytesseract.image_to_string(images[0]) if images else ""
+    finally:
+        for image in images:
+            image.close()
+
+
+def ocr_pdf_pages(pdf_path: str, page_indexes: list[int], dpi: int = 300) -> dict[int, str]:
+    """
+    OCRs only the requested pages, one page per task, across a bounded pool
+    of threads. pdftoppm and tesseract run as subprocesses, so the threads
+    use separate cores, and at most `OCR_WORKERS` page images exist at once.
+    Returns {page_index: text}.
+    """
+    if not page_indexes:
+        return {}
+
+    workers = min(len(page_indexes), ocr_workers())
+    print(f"🔍 OCR on {len(page_indexes)} pages with {workers} workers")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        texts = pool.map(lambda i: ocr_pdf_page(pdf_path, i, dpi), page_indexes)
+        return dict(zip(page_indexes, texts))
@@ -0,0 +1,198 @@
+import atexit
+import os
+import queue
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from config.settings import settings
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class OfficeWorker:
+    """
+    One long-lived headless LibreOffice instance driven through unoserver,
+    with its own user profile directory so workers never contend for a
+    profile lock.
+    """
+
+    def __init__(self, worker_id: int, base_dir: str):
+        self.worker_id = worker_id
+        self.profile_dir = os.path.join(base_dir, f"profile_{worker_id}")
+        self.process: Optional[subprocess.Popen] = None
+        self.port: Optional[int] = None
+
+    def start(self) -> None:
+        self.port = _free_port()
+        command = [
+            settings.UNOSERVER_PYTHON, "-m", "unoserver.server",
+            "--interface", "127.0.0.1",
+            "--port", str(self.port),
+            "--uno-port", str(_free_port()),
+            "--user-installation", Path(self.profile_dir).as_uri(),
+        ]
+        self.process = subprocess.Popen(
+            command,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+        deadline = time.monotonic() + settings.OFFICE_START_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            if self.is_healthy():
+                print(f"🖨️ LibreOffice worker {self.worker_id} ready on port {self.port}")
+                return
+            if self.process.poll() is not None:
+                break
+            time.sleep(0.25)
+
+        self.stop()
+        raise RuntimeError(f"LibreOffice worker {self.worker_id} failed to start")
+
+    def is_healthy(self) -> bool:
+        if self.process is None or self.process.poll() is not None:
+            return False
+        try:
+            with socket.create_connection(("127.0.0.1", self.port), timeout=1):
+                return True
+        except OSError:
+            return False
+
+    def stop(self) -> None:
+        if self.process is None:
+            return
+        try:
+            # unoserver runs soffice as a child; kill the whole process group.
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+        self.process = None
+
+    def restart(self) -> None:
+        print(f"♻️ Restarting LibreOffice worker {self.worker_id}")
+        self.stop()
+        self.start()
+
+    def convert_to_pdf(self, input_path: str, output_path: str, page_range: Optional[str], timeout: float) -> None:
+        from unoserver.client import UnoClient
+
+        filter_options = [f"PageRange={page_range}"] if page_range else []
+        errors: list[BaseException] = []
+
+        def run():
+            try:
+                UnoClient(server="127.0.0.1", port=str(self.port)).convert(
+                    inpath=input_path,
+                    outpath=output_path,
+                    convert_to="pdf",
+                    filter_options=filter_options,
+                )
+            except BaseException as e:
+                errors.append(e)
+
+        # The XML-RPC call has no timeout of its own; if it hangs, killing
+        # the worker makes it return.
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout)
+        if thread.is_alive():
+            self.restart()
+            raise TimeoutError(f"LibreOffice conversion exceeded {timeout}s")
+        if errors:
+            raise errors[0]
+
+
+class OfficeConverterPool:
+    """
+    A fixed-size pool of warm LibreOffice workers for PPTX -> PDF conversion.
+    Workers are started lazily, health-checked every time they are leased,
+    and restarted after a crash or a timed-out job.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: queue.Queue[OfficeWorker] = queue.Queue()
+        self._workers: list[OfficeWorker] = []
+        self._lock = threading.Lock()
+        self._base_dir: Optional[str] = None
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._workers:
+                return
+            self._base_dir = tempfile.mkdtemp(prefix="office_pool_")
+            try:
+                for worker_id in range(self.size):
+                    worker = OfficeWorker(worker_id, self._base_dir)
+                    worker.start()
+                    self._workers.append(worker)
+            except Exception:
+                self._stop_workers()
+                raise
+
+            for worker in self._workers:
+                self._idle.put(worker)
+            atexit.register(self.shutdown)
+            self._stop_workers_on_sigterm()
+
+    def _stop_workers_on_sigterm(self) -> None:
+        # ParseExecutor terminates its worker processes on timeout; atexit does
+        # not run on SIGTERM, and the LibreOffice workers live in their own
+        # sessions, so stop them explicitly before dying.
+        if threading.current_thread() is not threading.main_thread():
+            return
+
+        def handle_sigterm(signum, frame):
+            self._stop_workers()
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+
+    def convert_to_pdf(self, input_path: str, output_path: str, page_range: Optional[str] = None) -> str:
+        self._ensure_started()
+        worker = self._idle.get(timeout=settings.OFFICE_JOB_TIMEOUT_SECONDS)
+        try:
+            if not worker.is_healthy():
+                worker.restart()
+            worker.convert_to_pdf(input_path, output_path, page_range, settings.OFFICE_JOB_TIMEOUT_SECONDS)
+        except TimeoutError:
+            raise
+        except (ConnectionError, OSError):
+            # The worker died mid-job; restart it and retry once.
+            worker.restart()
+            worker.convert_to_pdf(input_path, output_path, page_range, settings.OFFICE_JOB_TIMEOUT_SECONDS)
+        finally:
+            self._idle.put(worker)
+        return output_path
+
+    def _stop_workers(self) -> None:
+        # Lock-free so it is safe to call from the SIGTERM handler.
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+        self._idle = queue.Queue()
+        if self._base_dir:
+            shutil.rmtree(self._base_dir, ignore_errors=True)
+            self._base_dir = None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._stop_workers()
+
+
+# One pool per process: parse jobs run in ParseExecutor worker processes,
+# each of which keeps its own warm LibreOffice workers.
+office_pool = OfficeConverterPool(size=settings.OFFICE_POOL_SIZE)
@@ -1,32 +1,52 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 import pdfplumber
-from pdf2image import convert_from_path
-import pytesseract
+from services.parser.ocr import ocr_pdf_page, ocr_workers
+from services.chunker import DocumentUnit
 
-def extract_text_from_pdf(pdf_path: str) -> list[str]:
-    full_text = ""
-    ocr_needed_pages = []
-    
-    with pdfplumber.open(pdf_path) as pdf:
+def iter_text_from_pdf(pdf_path: str) -> Iterator[DocumentUnit]:
+    """
+    Yields the text of each page in page order while the rest of the document
+    is still being read. Pages without a text layer are OCR'd in the
+    background, with at most OCR_WORKERS pages in flight, and emitted in
+    their original position. Each page is one unit carrying its page number.
+    """
+    workers = ocr_workers()
+    pending: deque = deque()
+
+    with pdfplumber.open(pdf_path) as pdf, ThreadPoolExecutor(max_workers=workers) as ocr_pool:
+        in_flight = 0
         for i, page in enumerate(pdf.pages):
             text = page.extract_text()
+            page.close()
+
             if text and text.strip():
-                full_text += text + "\n"
+                pending.append((i + 1, text))
             else:
                 print(f"⚠️ No text found on page {i+1} with pdfplumber, marking for OCR")
-                ocr_needed_pages.append(i)
+                pending.append((i + 1, ocr_pool.submit(ocr_pdf_page, pdf_path, i)))
+                in_flight += 1
 
-    chunks = [chunk.strip() for chunk in full_text.split("\n\n") if chunk.strip()]
-    
-    if ocr_needed_pages:
-        print("Falling back to OCR for some pages")
-        slides = convert_from_path(pdf_path, dpi=300)
-        for i in ocr_needed_pages:
-            image = slides[i]
-            ocr_text = pytesseract.image_to_string(image)
-            ocr_chunks = [chunk.strip() for chunk in ocr_text.split("\n\n") if chunk.strip()]
-            chunks.extend(ocr_chunks)
+            # Emit every page that is ready; block on the oldest OCR page
+            # only when too many are in flight.
+            while pending and (isinstance(pending[0][1], str) or pending[0][1].done() or in_flight > workers):
+                page_number, head = pending.popleft()
+                if not isinstance(head, str):
+                    head = head.result()
+                    in_flight -= 1
+                yield DocumentUnit(text=head, page=page_number, kind="page")
+
+        while pending:
+            page_number, head = pending.popleft()
+            yield DocumentUnit(text=head if isinstance(head, str) else head.result(), page=page_number, kind="page")
+
+def extract_text_from_pdf(pdf_path: str) -> list[str]:
+    chunks = []
+    for unit in iter_text_from_pdf(pdf_path):
+        chunks.extend(chunk.strip() for chunk in unit.text.split("\n\n") if chunk.strip())
     
     print(f"📄 Extracted {len(chunks)} chunks from PDF using pdfplumber")
     print(f"🔍 First chunk (100 chars): {repr(chunks[0][:100]) if chunks else 'No chunks'}")
     
-    return chunks
\ No newline at end of file
+    return chunks
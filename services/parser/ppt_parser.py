@@ -1,23 +1,30 @@
 import os
 import tempfile
 import subprocess
+from typing import Iterator
 from pptx import Presentation
-from pdf2image import convert_from_path
-import pytesseract
+from pdf2image import pdfinfo_from_path
+from services.parser.ocr import ocr_pdf_pages
+from services.parser.office_pool import office_pool
+from services.chunker import DocumentUnit
+from config.settings import settings
 
-def pptx_to_pdf(pptx_path: str, output_dir: str) -> str:
+def pptx_to_pdf_with_soffice(pptx_path: str, output_dir: str) -> str:
     """
-    Converts a PPTX file to PDF using LibreOffice and returns the actual PDF path.
+    Converts a PPTX file to PDF with a one-off LibreOffice process and returns the actual PDF path.
+    Used only when the warm conversion pool is unavailable.
     """
+    profile_dir = os.path.join(output_dir, "lo_profile")
     command = [
         "soffice",
         "--headless",
+        f"-env:UserInstallation=file://{profile_dir}",
         "--convert-to", "pdf",
         "--outdir", output_dir,
         pptx_path
     ]
     try:
-        result = subprocess.run(command, capture_output=True, check=True)
+        result = subprocess.run(command, capture_output=True, check=True, timeout=settings.OFFICE_JOB_TIMEOUT_SECONDS)
         print("✅ LibreOffice Output:", result.stdout.decode())
     except subprocess.CalledProcessError as e:
         print("❌ LibreOffice failed:", e.stderr.decode())
@@ -32,23 +39,48 @@ def pptx_to_pdf(pptx_path: str, output_dir: str) -> str:
     return pdf_path
 
 
+def pptx_to_pdf(pptx_path: str, output_dir: str, slides: list[int] | None = None) -> str:
+    """
+    Converts a PPTX file to PDF on a warm LibreOffice worker. When `slides`
+    (0-based) is given, only those slides are rendered, in order.
+    """
+    pdf_path = os.path.join(output_dir, os.path.splitext(os.path.basename(pptx_path))[0] + ".pdf")
+    page_range = ",".join(str(i + 1) for i in slides) if slides else None
+
+    try:
+        office_pool.convert_to_pdf(pptx_path, pdf_path, page_range)
+    except Exception as e:
+        print(f"⚠️ LibreOffice pool conversion failed ({e}), falling back to a one-off soffice run")
+        return pptx_to_pdf_with_soffice(pptx_path, output_dir)
+
+    if not os.path.exists(pdf_path):
+        raise FileNotFoundError(f"PDF not found at expected location: {pdf_path}")
+
+    return pdf_path
+
+
 def extract_text_from_pdf_ocr(pdf_path: str) -> list[str]:
-    slides = convert_from_path(pdf_path, dpi=300)
+    page_count = pdfinfo_from_path(pdf_path)["Pages"]
+    ocr_results = ocr_pdf_pages(pdf_path, list(range(page_count)))
     all_chunks = []
 
-    for i, image in enumerate(slides):
-        print(f"🔍 OCR on slide {i+1}")
-        text = pytesseract.image_to_string(image)
-        chunks = [chunk.strip() for chunk in text.split("\n\n") if chunk.strip()]
+    for i in range(page_count):
+        chunks = [chunk.strip() for chunk in ocr_results[i].split("\n\n") if chunk.strip()]
         all_chunks.extend(chunks)
 
     print(f"🖼️ Extracted {len(all_chunks)} chunks from OCR (PDF-based)")
     return all_chunks
 
 
-def extract_text_from_pptx(pptx_path: str) -> list[str]:
+def iter_text_from_pptx(pptx_path: str) -> Iterator[DocumentUnit]:
+    """
+    Yields one unit per slide, in slide order, with the slide number as the
+    page and the slide title (when it has one) as the section. Slides without
+    a text layer are rendered and OCR'd before anything is yielded.
+    """
     prs = Presentation(pptx_path)
-    full_text = []
+    slide_texts = []
+    slide_titles = []
     slides_needing_ocr = []
 
     for i, slide in enumerate(prs.slides):
@@ -57,28 +89,50 @@ def extract_text_from_pptx(pptx_path: str) -> list[str]:
             if hasattr(shape, "text") and shape.text.strip():
                 slide_text.append(shape.text.strip())
 
+        title_shape = slide.shapes.title
+        title = title_shape.text.strip() if title_shape is not None and title_shape.has_text_frame else ""
+        slide_titles.append(title or None)
+
         if slide_text:
-            full_text.append("\n".join(slide_text))
+            slide_texts.append("\n".join(slide_text))
         else:
             print(f"⚠️ No text found on slide {i+1}, marking for OCR.")
+            slide_texts.append("")
             slides_needing_ocr.append(i)
 
-    if not slides_needing_ocr:
+    if slides_needing_ocr:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            pdf_path = pptx_to_pdf(pptx_path, tmpdir, slides=slides_needing_ocr)
+            page_count = pdfinfo_from_path(pdf_path)["Pages"]
+
+            if page_count == len(slides_needing_ocr):
+                # Only the requested slides were rendered: page n is slides_needing_ocr[n].
+                page_to_slide = dict(enumerate(slides_needing_ocr))
+            else:
+                # The whole deck was rendered (e.g. the one-off soffice fallback).
+                page_to_slide = {i: i for i in slides_needing_ocr}
+
+            ocr_results = ocr_pdf_pages(pdf_path, list(page_to_slide))
+
+            for page, slide in page_to_slide.items():
+                slide_texts[slide] = ocr_results[page]
+    else:
         print("📊 All text extracted from PPTX without OCR.")
-        return [chunk.strip() for chunk in full_text if chunk.strip()]
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        pdf_path = pptx_to_pdf(pptx_path, tmpdir)
-        all_images = convert_from_path(pdf_path, dpi=300)
+    for i, text in enumerate(slide_texts):
+        if text.strip():
+            yield DocumentUnit(text=text, page=i + 1, section=slide_titles[i], kind="slide")
+
 
-        for i in slides_needing_ocr:
-            image = all_images[i]
-            print(f"🔍 OCR on slide {i+1}")
-            ocr_text = pytesseract.image_to_string(image)
-            ocr_chunks = [chunk.strip() for chunk in ocr_text.split("\n\n") if chunk.strip()]
-            full_text.extend(ocr_chunks)
+def extract_text_from_pptx(pptx_path: str) -> list[str]:
+    full_text = [
+        chunk.strip()
+        for unit in iter_text_from_pptx(pptx_path)
+        for chunk in unit.text.split("\n\n")
+        if chunk.strip()
+    ]
 
     print(f"📊 Extracted {len(full_text)} chunks from PPTX (with OCR fallback)")
     print(f"🔍 First chunk (100 chars): {repr(full_text[0][:100]) if full_text else 'No chunks'}")
 
-    return [chunk.strip() for chunk in full_text if chunk.strip()]
+    return full_text
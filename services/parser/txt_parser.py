@@ -1,8 +1,21 @@
-def extract_text_from_txt(txt_path: str) -> list[str]:
+from typing import Iterator
+from services.chunker import DocumentUnit
+
+def iter_text_from_txt(txt_path: str) -> Iterator[DocumentUnit]:
+    """Yields blank-line separated paragraphs while reading the file line by line."""
+    paragraph = []
     with open(txt_path, "r", encoding="utf-8") as f:
-        content = f.read()
+        for line in f:
+            if line.strip():
+                paragraph.append(line.rstrip("\n"))
+            elif paragraph:
+                yield DocumentUnit(text="\n".join(paragraph).strip())
+                paragraph = []
+    if paragraph:
+        yield DocumentUnit(text="\n".join(paragraph).strip())
 
-    chunks = [chunk.strip() for chunk in content.split("\n\n") if chunk.strip()]
+def extract_text_from_txt(txt_path: str) -> list[str]:
+    chunks = [unit.text for unit in iter_text_from_txt(txt_path) if unit.text]
 
     print(f"📜 Extracted {len(chunks)} chunks from TXT")
     print(f"🔍 First chunk (100 chars): {repr(chunks[0][:100]) if chunks else 'No chunks'}")
@@ -1,12 +1,21 @@
+from typing import Iterator
 from docx import Document
+from services.chunker import DocumentUnit
 
-def extract_text_from_docx(docx_path: str) -> list[str]:
+def iter_text_from_docx(docx_path: str) -> Iterator[DocumentUnit]:
   doc = Document(docx_path)
-  full_text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+  for para in doc.paragraphs:
+    if para.text.strip():
+      style = para.style.name if para.style is not None else ""
+      is_heading = style.startswith("Heading") or style == "Title"
+      yield DocumentUnit(text=para.text, kind="heading" if is_heading else "paragraph")
+
+def extract_text_from_docx(docx_path: str) -> list[str]:
+  full_text = "\n".join(unit.text for unit in iter_text_from_docx(docx_path))
   
   chunks = [chunk.strip() for chunk in full_text.split("\n\n") if chunk.strip()]
   
   print(f"📝 Extracted {len(chunks)} chunks from DOCX")
   print(f"🔍 First chunk (100 chars): {repr(chunks[0][:100]) if chunks else 'No chunks'}")
 
-  return chunks
\ No newline at end of file
+  return chunks
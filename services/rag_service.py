@@ -1,191 +1,445 @@
-from typing import List
-from pinecone import Pinecone
-from sqlalchemy.orm import Session
-from services.vector_store import embed_and_upsert, retrieve_from_kb, split_text, embed_text_batch
-from services.parser.pdf_parser import extract_text_from_pdf
-from services.parser.word_parser import extract_text_from_docx
-from services.parser.ppt_parser import extract_text_from_pptx
-from services.parser.excel_parser import extract_text_from_xlsx
-from services.parser.image_parser import extract_text_from_image
-from services.parser.txt_parser import extract_text_from_txt
-from services.gpt_client import ask_gpt
-import re
-import tempfile
-import aiohttp
+from typing import AsyncIterator, Iterator, List, Optional
+from services.vector_store import embed_and_upsert, retrieve_from_kb, retrieve_batch, embed_text_batch
+from services.clients import clients
+from services.chunker import Chunk, DocumentUnit, chunk_units_stream
+from services.bm25_index import BM25Builder, bm25_store
+from services.gpt_client import ask_gpt, ask_gpt_batch
+from services.context_builder import build_context, preamble_cache
+from services.ingestion_registry import (
+    ingestion_registry,
+    generate_namespace_from_url,
+    INGESTION_READY,
+    INGESTION_FAILED,
+)
+import os
+import socket
 import asyncio
+from contextlib import aclosing
 from config.settings import settings
-from config.mime_types import MIME_EXTENSION_MAP
+from services.download_service import DownloadedFile, downloaded_file
+from services.parse_executor import parse_executor
+from services.answer_cache import answer_cache
+from services.semantic_cache import semantic_cache
 # from logs.logs import add_logs
-import hashlib
 from services.document_db_service import (
     find_answers_in_db,
     append_qa_pairs,
     QAPair,
     create_document,
     get_document_by_url,
-    update_document,
     get_all_documents,
+    delete_all_qa_pairs,
 )
 
-pc = Pinecone(
-  api_key=settings.PINECONE_API_KEY
-)
-pinecone_index = pc.Index(settings.PINECONE_INDEX_NAME)
-
-def generate_namespace_from_url(url: str) -> str:
-    return re.sub(r'\W+', '_', url).strip('_').lower()
-
-async def download_file_to_temp(file_url: str) -> str:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(file_url) as response:
-            if response.status != 200:
-                raise Exception(f"Failed to download file. Status: {response.status}")
-            content = await response.read()
-            
-            content_type = response.headers.get("Content-Type", "")
-            ext = MIME_EXTENSION_MAP.get(content_type)
-            
-            if not ext:
-                raise Exception(f"Unsupported or unknown Content-Type: {content_type}")
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp:
-                tmp.write(content)
-                return tmp.name, content_type
-
-def parse_document_by_type(file_path: str, mime_type: str) -> str:
+# Identifies this worker process as the holder of an ingestion lease.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# document_url -> ingestion task shared by every concurrent request in this worker.
+_inflight_ingestions: dict[str, asyncio.Task] = {}
+
+# Parsers pull in pdfplumber, pdf2image, pytesseract, python-pptx, openpyxl
+# and python-docx, so each one is imported only when its type is parsed
+# (normally inside a parse worker process, never in the web process).
+# `encoding` is the charset the server declared; only the HTML parser uses it.
+def iter_document_by_type(file_path: str, mime_type: str, encoding: Optional[str] = None) -> Iterator[DocumentUnit]:
+    """Yields the document's structural units as they are extracted, picking the parser by MIME type."""
     if mime_type == "application/pdf":
-        return extract_text_from_pdf(file_path)
+        from services.parser.pdf_parser import iter_text_from_pdf
+        yield from iter_text_from_pdf(file_path)
     elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        return extract_text_from_docx(file_path)
+        from services.parser.word_parser import iter_text_from_docx
+        yield from iter_text_from_docx(file_path)
     elif mime_type == "application/vnd.openxmlformats-officedocument.presentationml.presentation":
-        return extract_text_from_pptx(file_path)
+        from services.parser.ppt_parser import iter_text_from_pptx
+        yield from iter_text_from_pptx(file_path)
     elif mime_type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet":
-        return extract_text_from_xlsx(file_path)
+        from services.parser.excel_parser import iter_text_from_xlsx
+        yield from iter_text_from_xlsx(file_path)
     elif mime_type in ["image/jpeg", "image/png"]:
-        return extract_text_from_image(file_path)
+        from services.parser.image_parser import iter_text_from_image
+        yield from iter_text_from_image(file_path)
     elif mime_type == "text/plain":
-        return extract_text_from_txt(file_path)
+        from services.parser.txt_parser import iter_text_from_txt
+        yield from iter_text_from_txt(file_path)
+    elif mime_type == "text/html":
+        from services.parser.html_parser import iter_text_from_html
+        yield from iter_text_from_html(file_path, encoding)
     else:
         raise ValueError(f"Unsupported file type: {mime_type}")
 
-async def process_documents_and_questions(document_url: str, questions: List[str]) -> dict:
-    print(f"Processing documents from URL: {document_url}")
-    print(f"Received questions: {questions}")
+async def _index_for_bm25(chunks: AsyncIterator[Chunk], builder: BM25Builder) -> AsyncIterator[Chunk]:
+    async for chunk in chunks:
+        builder.add(chunk.index, chunk.text)
+        yield chunk
+
+async def ingest_document(document_url: str, agent_id: str, prefetched: Optional[DownloadedFile] = None) -> None:
+    print(f"🆕 Namespace '{agent_id}' not ingested yet. Proceeding with download and embedding...")
+
+    try:
+        async with downloaded_file(document_url, prefetched) as downloaded:
+            duplicate = await ingestion_registry.find_ready_by_content_hash(downloaded.content_hash)
+            if duplicate:
+                print(f"♻️ Identical content already ingested as '{duplicate.namespace}'. Reusing its embeddings.")
+                await ingestion_registry.set_state(
+                    document_url,
+                    INGESTION_READY,
+                    namespace=duplicate.namespace,
+                    chunk_count=duplicate.chunk_count,
+                    content_hash=downloaded.content_hash,
+                )
+                return
+
+            # Resume after the last committed batch if a previous attempt on the same bytes was interrupted.
+            previous = await ingestion_registry.get(document_url)
+            resume_from = (
+                previous.committed_chunks
+                if previous and previous.content_hash == downloaded.content_hash
+                else 0
+            )
+            await ingestion_registry.record_progress(document_url, downloaded.content_hash, resume_from)
+
+            async def record_progress(committed_chunks: int) -> None:
+                await ingestion_registry.record_progress(document_url, downloaded.content_hash, committed_chunks)
+
+            # parse -> chunk -> embed -> upsert run as one overlapped pipeline;
+            # the BM25 index is built from the same chunks on the way through.
+            bm25_builder = BM25Builder()
+            async with aclosing(
+                parse_executor.stream(
+                    iter_document_by_type, downloaded.path, downloaded.content_type, downloaded.encoding
+                )
+            ) as units:
+                result = await embed_and_upsert(
+                    _index_for_bm25(chunk_units_stream(units), bm25_builder),
+                    agent_id,
+                    start_offset=resume_from,
+                    on_progress=record_progress,
+                )
+
+        if result.get("status") != "success":
+            raise RuntimeError(f"Embedding failed: {result.get('error')}")
+        print(f"🧾 Ingested {result['total_chunks']} chunks from document ({result['inserted']} new)")
 
-    existing_doc = await get_document_by_url(document_url)
-    if not existing_doc:
-        print(f"🆕 Creating document record in MongoDB for URL: {document_url}")
-        await create_document({
-            "document_url": document_url,
-            "questions": [],
-            "qa_pairs": []
-        })
+        try:
+            await asyncio.to_thread(lambda: bm25_store.save(agent_id, bm25_builder.build()))
+        except Exception as e:
+            # Retrieval falls back to dense-only search without the index.
+            print(f"⚠️ Failed to build the BM25 index for '{agent_id}': {e}")
+    except Exception as e:
+        await ingestion_registry.set_state(document_url, INGESTION_FAILED, error=str(e))
+        raise
+
+    await ingestion_registry.set_state(
+        document_url,
+        INGESTION_READY,
+        chunk_count=result["total_chunks"],
+        content_hash=downloaded.content_hash,
+    )
+
+async def _keep_lease_alive(document_url: str) -> None:
+    interval = settings.INGESTION_LEASE_SECONDS / 3
+    while True:
+        await asyncio.sleep(interval)
+        if not await ingestion_registry.renew_lease(document_url, WORKER_ID, settings.INGESTION_LEASE_SECONDS):
+            print(f"⚠️ Lost ingestion lease for {document_url}")
+            return
+
+async def _ingest_with_lease(document_url: str, agent_id: str, prefetched: Optional[DownloadedFile] = None) -> None:
+    """
+    Ingests the document if this worker wins the Mongo lease; otherwise waits
+    for the worker holding it to finish. An expired lease (crashed worker) is
+    taken over on the next poll. Owns `prefetched` and removes it when done.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.INGESTION_WAIT_SECONDS
+
+    try:
+        while True:
+            if await ingestion_registry.acquire_lease(document_url, agent_id, WORKER_ID, settings.INGESTION_LEASE_SECONDS):
+                heartbeat = asyncio.create_task(_keep_lease_alive(document_url))
+                try:
+                    await ingest_document(document_url, agent_id, prefetched)
+                finally:
+                    heartbeat.cancel()
+                return
+
+            state = await ingestion_registry.get(document_url)
+            if state and state.status == INGESTION_READY:
+                print(f"📂 Namespace '{agent_id}' was ingested by another worker.")
+                return
+
+            if loop.time() > deadline:
+                raise TimeoutError(f"Timed out waiting for ingestion of {document_url}")
+
+            print(f"⏳ Waiting for another worker to finish ingesting {document_url}...")
+            await asyncio.sleep(settings.INGESTION_POLL_SECONDS)
+    finally:
+        if prefetched:
+            prefetched.cleanup()
+
+async def ensure_document_ingested(document_url: str, agent_id: str, prefetched: Optional[DownloadedFile] = None) -> None:
+    """
+    Single-flight ingestion: the first caller in this process starts the
+    ingestion task and every concurrent caller awaits the same task. A
+    `prefetched` download is handed to the task (which removes it), or
+    removed right away when joining an ingestion that is already running.
+    """
+    task = _inflight_ingestions.get(document_url)
+    if task is None:
+        task = asyncio.create_task(_ingest_with_lease(document_url, agent_id, prefetched))
+        _inflight_ingestions[document_url] = task
+        task.add_done_callback(lambda _: _inflight_ingestions.pop(document_url, None))
     else:
-        print(f"📄 Document already exists in MongoDB")
-
-    agent_id = generate_namespace_from_url(document_url)
-    existing_namespaces = pinecone_index.describe_index_stats().namespaces.keys()
-
-    if agent_id not in existing_namespaces:
-        print(f"🆕 Namespace '{agent_id}' not found. Proceeding with download and embedding...")
-
-        local_file_path, content_type = await download_file_to_temp(document_url)
-        raw_text_output = parse_document_by_type(local_file_path, content_type)
-        raw_text = "\n".join(raw_text_output) if isinstance(raw_text_output, list) else raw_text_output
-        print(f"📄 Extracted {len(raw_text)} characters from document")
+        print(f"🔗 Joining in-flight ingestion of {document_url}")
+        if prefetched:
+            prefetched.cleanup()
+
+    # Shielded so one cancelled request does not abort ingestion for the others.
+    await asyncio.shield(task)
+
+def _group_questions_by_chunks(questions: List[str], chunks: dict[str, list[dict]], max_size: int) -> list[list[str]]:
+    """Greedily groups questions whose retrieved chunks overlap, at most `max_size` per group."""
+    groups: list[tuple[list[str], set[str]]] = []
+    for question in questions:
+        ids = {chunk["id"] for chunk in chunks[question]}
+        for group, group_ids in groups:
+            if len(group) < max_size and ids & group_ids:
+                group.append(question)
+                group_ids |= ids
+                break
+        else:
+            groups.append(([question], ids))
+    return [group for group, _ in groups]
+
+async def iter_answers(
+    document_url: str,
+    questions: List[str],
+    prefetched: Optional[DownloadedFile] = None,
+) -> AsyncIterator[tuple[str, str]]:
+    """
+    Yields (question, answer) as soon as each answer is known: cached answers
+    first, then generated ones in completion order. New answers are saved in
+    one batch at the end, or when the consumer stops early.
+    """
+    print(f"Processing documents from URL: {document_url}")
+    print(f"Received questions: {questions}")
+    questions = list(dict.fromkeys(questions))
+
+    # Step 0: In-process answer cache; a full hit needs no network I/O at all
+    cached_answers = answer_cache.get_many(document_url, questions)
+    if len(cached_answers) == len(questions):
+        print(f"⚡ All {len(questions)} answers served from the in-process cache")
+        if prefetched:
+            prefetched.cleanup()
+        for question, answer in cached_answers.items():
+            yield question, answer
+        return
 
-        chunks = split_text(raw_text)
-        print(f"🧾 Extracted {len(chunks)} chunks from PDF")
+    # `prefetched` is ours until ingestion takes it over; remove it if we stop before that.
+    try:
+        for question, answer in cached_answers.items():
+            yield question, answer
 
-        await embed_and_upsert(chunks, agent_id)
+        ingestion_state = await ingestion_registry.get(document_url)
+        if ingestion_state is None:
+            existing_doc = await get_document_by_url(document_url)
+            if not existing_doc:
+                print(f"🆕 Creating document record in MongoDB for URL: {document_url}")
+                try:
+                    await create_document({
+                        "document_url": document_url,
+                        "questions": [],
+                    })
+                except ValueError:
+                    print("📄 Document record was created by a concurrent request")
+            else:
+                print("📄 Document already exists in MongoDB")
+
+        agent_id = (
+            ingestion_state.namespace
+            if ingestion_state and ingestion_state.namespace
+            else generate_namespace_from_url(document_url)
+        )
+    except BaseException:
+        if prefetched:
+            prefetched.cleanup()
+        raise
+
+    if not ingestion_state or ingestion_state.status != INGESTION_READY:
+        await ensure_document_ingested(document_url, agent_id, prefetched)
+        # Identical content may have been mapped onto another document's namespace.
+        agent_id = (await ingestion_registry.get(document_url)).namespace or agent_id
     else:
-        print(f"📂 Namespace '{agent_id}' already exists. Skipping download and embedding.")
+        print(f"📂 Namespace '{agent_id}' already ingested. Skipping download and embedding.")
+        if prefetched:
+            prefetched.cleanup()
 
     # Step 1: Check existing answers in MongoDB
-    existing_answers = await find_answers_in_db(document_url, questions)
+    db_answers = await find_answers_in_db(document_url, [q for q in questions if q not in cached_answers])
+    answer_cache.put_many(document_url, db_answers)
+    for question, answer in db_answers.items():
+        yield question, answer
+    existing_answers = cached_answers | db_answers
     unanswered_questions = [q for q in questions if q not in existing_answers]
 
-    print(f"Found {len(existing_answers)} answers in DB")
+    print(f"Found {len(cached_answers)} answers in memory and {len(db_answers)} in DB")
     print(f"{len(unanswered_questions)} questions to process further")
 
+    # Answers worth keeping, written to MongoDB in one bulk write at the end.
+    new_pairs: list[QAPair] = []
+    question_vectors: dict[str, list[float]] = {}
+
+    # Step 2: Check the semantic question cache for every question with one matrix multiply
+    if settings.SEMANTIC_CACHE_ENABLED and unanswered_questions:
+        vectors = await embed_text_batch(unanswered_questions)
+        if vectors:
+            question_vectors = dict(zip(unanswered_questions, vectors))
+            semantic_answers = {}
+            for question, cached_answer in zip(unanswered_questions, semantic_cache.lookup(agent_id, vectors)):
+                if cached_answer is not None:
+                    semantic_answers[question] = cached_answer
+                    new_pairs.append(QAPair(question=question, answer=cached_answer))
+                    yield question, cached_answer
+            print(f"✅ {len(semantic_answers)} semantic cache hits")
+            unanswered_questions = [q for q in unanswered_questions if q not in semantic_answers]
+
+    # Step 3: Retrieve context for all remaining questions in one batch
+    batch_chunks: dict[str, list[dict]] = {}
+    if unanswered_questions:
+        try:
+            retrieved = await retrieve_batch(unanswered_questions, agent_id, top_k=3, query_vectors=question_vectors)
+            batch_chunks = dict(zip(unanswered_questions, retrieved))
+        except Exception as e:
+            print(f"⚠️ Batch retrieval failed, falling back to per-question retrieval: {e}")
+
     semaphore = asyncio.Semaphore(15)
+    generated_pairs: list[QAPair] = []
+    preamble, preamble_chunks = await preamble_cache.get(agent_id)
 
-    async def process_question(index: int, question: str) -> tuple[int, str, str]:
+    async def process_question(question: str) -> list[tuple[str, str]]:
         async with semaphore:
             for attempt in range(3):
                 try:
-                    question_cached_namespace = f"question_cached_{agent_id}"
-                    
-                    question_vector = await embed_text_batch([question])
-                    if not question_vector or not question_vector[0]:
-                        raise ValueError("Failed to embed question")
-
-                    # Step 2: Check Pinecone
-                    cache_result = pinecone_index.query(
-                        vector=question_vector[0],
-                        namespace=question_cached_namespace,
-                        top_k=1,
-                        include_metadata=True
-                    )
-
-                    if cache_result.matches and cache_result.matches[0].score > 0.9:
-                        cached_answer = cache_result.matches[0].metadata.get("answer", "")
-                        print(f"✅ Q{index}: Semantic cache hit")
-                        
-                        # Save to MongoDB
-                        await append_qa_pairs(document_url, [QAPair(question=question, answer=cached_answer)])
-
-                        return (index, question, cached_answer)
-
-                    # Step 3: Retrieve context and ask GPT
-                    print(f"Q{index}: No semantic match found, querying GPT")
-                    retrieved = await retrieve_from_kb({"query": question, "agent_id": agent_id, "top_k": 3})
-                    retrieved_chunks = retrieved.get("chunks", [])
+                    # Step 4: Ask GPT with the retrieved context
+                    retrieved_chunks = batch_chunks.get(question) if attempt == 0 else None
+                    if not retrieved_chunks:
+                        retrieved = await retrieve_from_kb({"query": question, "agent_id": agent_id, "top_k": 3})
+                        retrieved_chunks = retrieved.get("chunks", [])
 
                     if not retrieved_chunks:
                         raise ValueError("No chunks retrieved")
 
-                    max_context_chars = 3000
-                    context = "\n".join(retrieved_chunks)[:max_context_chars]
+                    context = build_context(retrieved_chunks, settings.CONTEXT_MAX_TOKENS, skip_indexes=preamble_chunks)
+                    answer = await ask_gpt(context, question, preamble=preamble)
 
-                    answer = await ask_gpt(context, question)
-
-                    # Cache in Pinecone
-                    hash_digest = hashlib.sha256(question.encode()).hexdigest()[:12]
-                    vector_id = f"q_{hash_digest}_{agent_id}"
-                    pinecone_index.upsert(
-                        vectors=[{
-                            "id": vector_id,
-                            "values": question_vector[0],
-                            "metadata": {"question": question, "answer": answer}
-                        }],
-                        namespace=question_cached_namespace
-                    )
-
-                    # Save in MongoDB
-                    await append_qa_pairs(document_url, [QAPair(question=question, answer=answer)])
-
-                    return (index, question, answer)
+                    generated_pairs.append(QAPair(question=question, answer=answer))
+                    return [(question, answer)]
 
                 except Exception as e:
-                    print(f"⚠️ Q{index}: Attempt {attempt + 1} failed with error: {e}")
+                    print(f"⚠️ {question!r}: Attempt {attempt + 1} failed with error: {e}")
 
-            return (index, question, "Sorry, I couldn't find relevant information.")
+            return [(question, "Sorry, I couldn't find relevant information.")]
 
-    print(f"🧠 Processing {len(unanswered_questions)} unanswered questions...")
-    tasks = [asyncio.create_task(process_question(i, q)) for i, q in enumerate(unanswered_questions)]
-    responses = await asyncio.gather(*tasks)
+    async def answer_group(group: list[str]) -> list[tuple[str, str]]:
+        # Step 4 (batched): one completion for questions that share retrieved chunks;
+        # whatever it leaves unanswered is asked on its own.
+        answers: list[Optional[str]] = [None] * len(group)
+        async with semaphore:
+            chunks = [chunk for q in group for chunk in batch_chunks[q]]
+            context = build_context(chunks, settings.GPT_BATCH_CONTEXT_TOKENS, skip_indexes=preamble_chunks)
+            try:
+                answers = await ask_gpt_batch(context, group, preamble=preamble)
+            except Exception as e:
+                print(f"⚠️ Batched answering of {len(group)} questions failed: {e}")
+        results = []
+        for question, answer in zip(group, answers):
+            if answer is not None:
+                generated_pairs.append(QAPair(question=question, answer=answer))
+                results.append((question, answer))
+        fallbacks = await asyncio.gather(*(process_question(q) for q, a in zip(group, answers) if a is None))
+        return results + [pair for pairs in fallbacks for pair in pairs]
+
+    groups = [[q] for q in unanswered_questions]
+    if settings.GPT_BATCH_ANSWERS and batch_chunks:
+        groups = _group_questions_by_chunks(
+            [q for q in unanswered_questions if batch_chunks.get(q)],
+            batch_chunks,
+            settings.GPT_BATCH_SIZE,
+        ) + [[q] for q in unanswered_questions if not batch_chunks.get(q)]
+        print(f"📚 Answering in {sum(1 for g in groups if len(g) > 1)} batched completions")
 
-    new_answers = {q: ans for _, q, ans in sorted(responses)}
-    all_answers = existing_answers | new_answers
+    print(f"🧠 Processing {len(unanswered_questions)} unanswered questions...")
+    tasks = [
+        asyncio.create_task(answer_group(group) if len(group) > 1 else process_question(group[0]))
+        for group in groups
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for question, answer in await next_done:
+                yield question, answer
+    finally:
+        # The consumer may stop early (e.g. a streaming client disconnected). Pending
+        # questions are dropped, but answers already generated are still saved.
+        for task in tasks:
+            task.cancel()
+        new_pairs.extend(generated_pairs)
+        await asyncio.shield(asyncio.ensure_future(
+            _save_answers(document_url, agent_id, new_pairs, generated_pairs, question_vectors)
+        ))
 
     # Optionally log: add_logs(pdf_url, all_answers)
 
-    return all_answers
+async def _save_answers(
+    document_url: str,
+    agent_id: str,
+    new_pairs: list[QAPair],
+    generated_pairs: list[QAPair],
+    question_vectors: dict[str, list[float]],
+) -> None:
+    # Remember the generated answers in the semantic cache in one batch
+    cacheable = [pair for pair in generated_pairs if pair.question in question_vectors]
+    if cacheable:
+        try:
+            await asyncio.to_thread(
+                semantic_cache.add_many,
+                agent_id,
+                [pair.question for pair in cacheable],
+                [question_vectors[pair.question] for pair in cacheable],
+                [pair.answer for pair in cacheable],
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to update the semantic cache: {e}")
+
+    # Step 5: Save every new answer in memory and in MongoDB with a single bulk write
+    answer_cache.put_many(document_url, {pair.question: pair.answer for pair in new_pairs})
+    try:
+        stored = await append_qa_pairs(document_url, new_pairs)
+        print(f"💾 Stored {stored} new QA pairs")
+    except Exception as e:
+        print(f"⚠️ Failed to store QA pairs: {e}")
+
+async def process_documents_and_questions(
+    document_url: str,
+    questions: List[str],
+    prefetched: Optional[DownloadedFile] = None,
+) -> dict:
+    answers = {}
+    async for question, answer in iter_answers(document_url, questions, prefetched):
+        answers[question] = answer
+    # Answers arrive in completion order; return them in question order.
+    return {q: answers[q] for q in questions if q in answers}
 
 async def clear_qa_caches():
     print("🧹 Starting cache cleanup process...")
 
+    answer_cache.clear()
+    semantic_cache.clear()
+    preamble_cache.clear()
+
+    print("🗑️ Clearing QA pairs from MongoDB...")
+    deleted = await delete_all_qa_pairs()
+    print(f"🗑️ Deleted {deleted} QA pairs")
+
     all_documents = await get_all_documents()
     if not all_documents:
         print("❌ No documents found in DB.")
@@ -197,19 +451,18 @@ async def clear_qa_caches():
             continue
 
         print(f"\n🧾 Processing document: {pdf_url}")
-        agent_id = generate_namespace_from_url(str(pdf_url))
+        agent_id = (
+            doc.ingestion.namespace
+            if doc.ingestion and doc.ingestion.namespace
+            else generate_namespace_from_url(str(pdf_url))
+        )
+        # Semantic cache namespace written by earlier versions.
         question_namespace = f"question_cached_{agent_id}"
 
-        print("🗑️ Clearing QA pairs from MongoDB...")
-        await update_document(str(pdf_url), {
-            "qa_pairs": [],
-            "questions": []
-        })
-
         try:
-            print(f"🗑️ Deleting namespace '{question_namespace}' from Pinecone...")
-            pinecone_index.delete(delete_all=True, namespace=question_namespace)
+            print(f"🗑️ Deleting namespace '{question_namespace}' from the vector index...")
+            clients.vector_index.delete_namespace(question_namespace)
         except Exception as e:
-            print(f"⚠️ Failed to delete Pinecone namespace {question_namespace}: {e}")
+            print(f"⚠️ Failed to delete namespace {question_namespace}: {e}")
 
     print("\n✅ Finished clearing all QA caches.")
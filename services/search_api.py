@@ -1,8 +1,11 @@
-from serpapi import GoogleSearch
 from config.settings import settings
+from services.download_service import get_http_session
 
-def serper_search(query: str) -> str:
+SERPAPI_URL = "https://serpapi.com/search.json"
+
+async def serper_search(query: str) -> str:
     params = {
+        "engine": "google",
         "q": query,
         "hl": "en",
         "gl": "in",
@@ -10,8 +13,9 @@ def serper_search(query: str) -> str:
         "api_key": settings.SERPAPI_API_KEY,
     }
 
-    search = GoogleSearch(params)
-    results = search.get_dict()
+    async with get_http_session().get(SERPAPI_URL, params=params) as response:
+        response.raise_for_status()
+        results = await response.json()
     try:
         snippet = results["organic_results"][0]["snippet"]
         return snippet
@@ -0,0 +1,102 @@
+import hashlib
+import shutil
+import threading
+from typing import Optional
+from config.settings import settings
+from services.vector_index import LocalVectorStore
+
+
+class SemanticQuestionCache:
+    """
+    Per-document cache of answered questions, matched by embedding similarity.
+
+    Each namespace (a document's agent_id) is stored as a LocalVectorStore
+    namespace under `root_dir`: question embeddings in the append-only
+    vectors.f32 and {"question", "answer"} metadata in meta.jsonl, keyed by
+    a hash of the question so re-answering a question replaces its entry.
+    Adding answers appends only the new rows under a file lock, so workers
+    never overwrite each other's entries, and each worker reads only what
+    was appended since its last lookup.
+
+    All questions of a request are checked with one matrix multiply, and a
+    question whose best cosine similarity exceeds `threshold` reuses that
+    answer.
+    """
+
+    def __init__(self, root_dir: str, threshold: float):
+        self.root_dir = root_dir
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._store: Optional[LocalVectorStore] = None
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def store(self) -> LocalVectorStore:
+        with self._lock:
+            if self._store is None:
+                self._store = LocalVectorStore(self.root_dir)
+            return self._store
+
+    @staticmethod
+    def _question_id(question: str) -> str:
+        return hashlib.sha256(question.encode("utf-8")).hexdigest()[:32]
+
+    def lookup(self, namespace: str, vectors: list[list[float]]) -> list[Optional[str]]:
+        """Returns the cached answer for each query vector, or None when nothing is similar enough."""
+        if not vectors:
+            return []
+
+        try:
+            matches = self.store.query_many(vectors, namespace, top_k=1)
+        except ValueError:
+            # Cached with a different embedding model.
+            matches = [[] for _ in vectors]
+        results: list[Optional[str]] = [
+            best[0].metadata.get("answer") if best and best[0].score > self.threshold else None
+            for best in matches
+        ]
+
+        hits = sum(1 for answer in results if answer is not None)
+        self.lookups += len(vectors)
+        self.hits += hits
+        self.misses += len(vectors) - hits
+        return results
+
+    def add_many(self, namespace: str, questions: list[str], vectors: list[list[float]], answers: list[str]) -> None:
+        if not questions:
+            return
+
+        entries = [
+            {"id": self._question_id(question), "values": vector, "metadata": {"question": question, "answer": answer}}
+            for question, vector, answer in zip(questions, vectors, answers)
+        ]
+        try:
+            self.store.upsert(entries, namespace)
+        except ValueError:
+            # Embedded with a different model: start the namespace over.
+            self.store.delete_namespace(namespace)
+            self.store.upsert(entries, namespace)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store = None
+            shutil.rmtree(self.root_dir, ignore_errors=True)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.SEMANTIC_CACHE_ENABLED,
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "namespaces": len(self.store.list_namespaces()),
+        }
+
+
+semantic_cache = SemanticQuestionCache(
+    root_dir=settings.SEMANTIC_CACHE_DIR,
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+)
@@ -0,0 +1,333 @@
+import fcntl
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import numpy as np
+
+from config.settings import settings
+
+_NAMESPACE_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+
+@dataclass
+class VectorMatch:
+    id: str
+    score: float
+    metadata: dict = field(default_factory=dict)
+
+
+class VectorStore:
+    """Interface shared by the vector index backends used by vector_store.py."""
+
+    def upsert(self, vectors: list[dict], namespace: str) -> dict:
+        raise NotImplementedError
+
+    def query(self, vector: list[float], namespace: str, top_k: int = 5, include_metadata: bool = True) -> list[VectorMatch]:
+        raise NotImplementedError
+
+    def query_many(self, vectors: list[list[float]], namespace: str, top_k: int = 5, include_metadata: bool = True) -> list[list[VectorMatch]]:
+        """Nearest neighbours for several query vectors; backends override this to score them together."""
+        return [self.query(vector, namespace, top_k, include_metadata) for vector in vectors]
+
+    def fetch(self, ids: list[str], namespace: str) -> dict[str, dict]:
+        """Returns {id: metadata} for the ids that exist in the namespace."""
+        raise NotImplementedError
+
+    def list_namespaces(self) -> set[str]:
+        raise NotImplementedError
+
+    def delete_namespace(self, namespace: str) -> None:
+        raise NotImplementedError
+
+
+@dataclass
+class _NamespaceState:
+    """What has been read of one namespace's files so far."""
+    inode: int = 0
+    offset: int = 0
+    dim: int = 0
+    ids: list[str] = field(default_factory=list)
+    position: dict[str, int] = field(default_factory=dict)
+    metadata: list[dict] = field(default_factory=list)
+    matrix: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=np.float32))
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Keeps every namespace as an append-only pair of files on disk:
+
+        <root>/<namespace>/vectors.f32   raw float32 rows, L2-normalised
+        <root>/<namespace>/meta.jsonl    {"dim": n}, then one {"id", "metadata"} line per upserted vector
+
+    An upsert appends its new rows and metadata lines (an existing id is
+    overwritten in place and its later line wins), so ingesting a document
+    in batches costs O(batch) per call rather than rewriting the namespace.
+    Writers in every process serialise on an flock of <namespace>/.lock;
+    readers take no lock and pick up only the lines added since their last
+    read, ignoring rows whose metadata has not landed yet. The matrix
+    is memory-mapped, so a top-k query is one dot product against the mapped
+    rows with no network round trip.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    META_FILE = "meta.jsonl"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+        self._lock = threading.RLock()
+        self._cache: dict[str, _NamespaceState] = {}
+
+    def _namespace_dir(self, namespace: str) -> str:
+        if not namespace or not _NAMESPACE_PATTERN.match(namespace):
+            raise ValueError(f"Invalid namespace: {namespace!r}")
+        return os.path.join(self.root_dir, namespace)
+
+    @contextmanager
+    def _write_lock(self, ns_dir: str) -> Iterator[None]:
+        """Excludes writers in other processes; the thread lock covers this one."""
+        os.makedirs(ns_dir, exist_ok=True)
+        with open(os.path.join(ns_dir, self.LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self, namespace: str) -> _NamespaceState:
+        ns_dir = self._namespace_dir(namespace)
+        meta_path = os.path.join(ns_dir, self.META_FILE)
+        try:
+            stat = os.stat(meta_path)
+        except FileNotFoundError:
+            self._cache.pop(namespace, None)
+            return _NamespaceState()
+
+        state = self._cache.get(namespace)
+        if state is None or state.inode != stat.st_ino or stat.st_size < state.offset:
+            # First read, or the namespace was deleted and written again.
+            state = _NamespaceState(inode=stat.st_ino)
+            self._cache[namespace] = state
+        if stat.st_size == state.offset:
+            return state
+
+        with open(meta_path, "rb") as f:
+            f.seek(state.offset)
+            data = f.read()
+        # Another worker may be half way through writing its last line.
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            record = json.loads(line)
+            if "dim" in record:
+                state.dim = record["dim"]
+                continue
+            row = state.position.get(record["id"])
+            if row is None:
+                state.position[record["id"]] = len(state.ids)
+                state.ids.append(record["id"])
+                state.metadata.append(record["metadata"])
+            else:
+                state.metadata[row] = record["metadata"]
+        state.offset += end
+
+        vectors_path = os.path.join(ns_dir, self.VECTORS_FILE)
+        row_bytes = state.dim * np.dtype(np.float32).itemsize
+        rows = os.path.getsize(vectors_path) // row_bytes if row_bytes and os.path.exists(vectors_path) else 0
+        count = min(len(state.ids), rows)
+        if count:
+            state.matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(count, state.dim))
+        else:
+            state.matrix = np.empty((0, state.dim), dtype=np.float32)
+        return state
+
+    @staticmethod
+    def _normalize(rows: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(rows, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return rows / norms
+
+    def upsert(self, vectors: list[dict], namespace: str) -> dict:
+        if not vectors:
+            return {"upserted_count": 0}
+
+        ns_dir = self._namespace_dir(namespace)
+        incoming = self._normalize(np.asarray([v["values"] for v in vectors], dtype=np.float32))
+        with self._lock, self._write_lock(ns_dir):
+            # Loaded under the file lock, so rows other workers appended are counted.
+            state = self._load(namespace)
+            dim = incoming.shape[1]
+            if state.dim and dim != state.dim:
+                raise ValueError(
+                    f"Dimension mismatch for namespace '{namespace}': "
+                    f"expected {state.dim}, got {dim}"
+                )
+
+            updated: dict[int, np.ndarray] = {}
+            appended: dict[str, np.ndarray] = {}
+            lines = [] if state.dim else [json.dumps({"dim": dim})]
+            for row, vector in zip(incoming, vectors):
+                vector_id = vector["id"]
+                if vector_id in state.position:
+                    updated[state.position[vector_id]] = row
+                else:
+                    appended[vector_id] = row
+                lines.append(json.dumps({"id": vector_id, "metadata": vector.get("metadata") or {}}))
+
+            vectors_path = os.path.join(ns_dir, self.VECTORS_FILE)
+            row_bytes = dim * incoming.itemsize
+
+            # Rows go in before the metadata lines that make them visible to readers.
+            if not os.path.exists(vectors_path):
+                open(vectors_path, "wb").close()
+            with open(vectors_path, "r+b") as f:
+                # Drop rows left behind by a writer that died before its metadata landed.
+                f.truncate(len(state.ids) * row_bytes)
+                for position, row in updated.items():
+                    f.seek(position * row_bytes)
+                    f.write(row.tobytes())
+                if appended:
+                    f.seek(0, os.SEEK_END)
+                    f.write(np.ascontiguousarray(np.vstack(list(appended.values()))).tobytes())
+
+            with open(os.path.join(ns_dir, self.META_FILE), "a", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in lines))
+
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector: list[float], namespace: str, top_k: int = 5, include_metadata: bool = True) -> list[VectorMatch]:
+        with self._lock:
+            state = self._load(namespace)
+            ids, metadata, matrix = state.ids, state.metadata, state.matrix
+        # `ids` may grow under a later upsert; the matrix snapshot decides what is searched.
+        if not matrix.shape[0] or top_k <= 0:
+            return []
+
+        query_vector = self._normalize(np.asarray(vector, dtype=np.float32))
+        scores = matrix @ query_vector
+
+        k = min(top_k, matrix.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            VectorMatch(
+                id=ids[i],
+                score=float(scores[i]),
+                metadata=metadata[i] if include_metadata else {},
+            )
+            for i in top
+        ]
+
+    def query_many(self, vectors: list[list[float]], namespace: str, top_k: int = 5, include_metadata: bool = True) -> list[list[VectorMatch]]:
+        with self._lock:
+            state = self._load(namespace)
+            ids, metadata, matrix = state.ids, state.metadata, state.matrix
+        if not vectors:
+            return []
+        if not matrix.shape[0] or top_k <= 0:
+            return [[] for _ in vectors]
+
+        # One (queries x rows) product scores every query against the namespace.
+        queries = self._normalize(np.asarray(vectors, dtype=np.float32))
+        scores = queries @ matrix.T
+
+        k = min(top_k, matrix.shape[0])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        top = np.take_along_axis(top, np.argsort(-top_scores, axis=1), axis=1)
+
+        return [
+            [
+                VectorMatch(
+                    id=ids[i],
+                    score=float(row_scores[i]),
+                    metadata=metadata[i] if include_metadata else {},
+                )
+                for i in row
+            ]
+            for row, row_scores in zip(top, scores)
+        ]
+
+    def fetch(self, ids: list[str], namespace: str) -> dict[str, dict]:
+        with self._lock:
+            state = self._load(namespace)
+            return {
+                vector_id: state.metadata[state.position[vector_id]]
+                for vector_id in ids if vector_id in state.position
+            }
+
+    def list_namespaces(self) -> set[str]:
+        return {
+            name for name in os.listdir(self.root_dir)
+            if os.path.exists(os.path.join(self.root_dir, name, self.META_FILE))
+        }
+
+    def delete_namespace(self, namespace: str) -> None:
+        ns_dir = self._namespace_dir(namespace)
+        with self._lock:
+            self._cache.pop(namespace, None)
+            if not os.path.isdir(ns_dir):
+                return
+            with self._write_lock(ns_dir):
+                for name in os.listdir(ns_dir):
+                    os.remove(os.path.join(ns_dir, name))
+            os.rmdir(ns_dir)
+
+
+class PineconeVectorStore(VectorStore):
+    def __init__(self, api_key: str, index_name: str, query_concurrency: int):
+        from pinecone import Pinecone
+
+        self.index = Pinecone(api_key=api_key).Index(index_name)
+        self._query_pool = ThreadPoolExecutor(max_workers=max(query_concurrency, 1), thread_name_prefix="pinecone-query")
+
+    def upsert(self, vectors: list[dict], namespace: str) -> dict:
+        return self.index.upsert(vectors=vectors, namespace=namespace)
+
+    def query(self, vector: list[float], namespace: str, top_k: int = 5, include_metadata: bool = True) -> list[VectorMatch]:
+        results = self.index.query(
+            vector=vector,
+            namespace=namespace,
+            top_k=top_k,
+            include_metadata=include_metadata
+        )
+        return [
+            VectorMatch(id=match.id, score=match.score, metadata=match.metadata or {})
+            for match in results.matches
+        ]
+
+    def query_many(self, vectors: list[list[float]], namespace: str, top_k: int = 5, include_metadata: bool = True) -> list[list[VectorMatch]]:
+        # Pinecone has no multi-vector query, so the round trips are overlapped instead.
+        if len(vectors) <= 1:
+            return [self.query(vector, namespace, top_k, include_metadata) for vector in vectors]
+        return list(self._query_pool.map(lambda vector: self.query(vector, namespace, top_k, include_metadata), vectors))
+
+    def fetch(self, ids: list[str], namespace: str) -> dict[str, dict]:
+        if not ids:
+            return {}
+        response = self.index.fetch(ids=ids, namespace=namespace)
+        return {vector_id: vector.metadata or {} for vector_id, vector in response.vectors.items()}
+
+    def list_namespaces(self) -> set[str]:
+        return set(self.index.describe_index_stats().namespaces.keys())
+
+    def delete_namespace(self, namespace: str) -> None:
+        self.index.delete(delete_all=True, namespace=namespace)
+
+
+def get_vector_store() -> VectorStore:
+    backend = settings.VECTOR_BACKEND.lower()
+    if backend == "local":
+        return LocalVectorStore(settings.VECTOR_STORE_DIR)
+    if backend == "pinecone":
+        return PineconeVectorStore(
+            settings.PINECONE_API_KEY, settings.PINECONE_INDEX_NAME, settings.PINECONE_QUERY_CONCURRENCY
+        )
+    raise ValueError(f"Unknown VECTOR_BACKEND: {settings.VECTOR_BACKEND}")
@@ -1,82 +1,336 @@
-from pinecone import Pinecone
-from openai import OpenAI
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Optional
+import numpy as np
 from config.settings import settings
+from services.embedding_service import embedding_batcher
+from services.clients import clients
+from services.chunker import CHARS_PER_TOKEN, Chunk, DocumentUnit, chunk_units, estimate_tokens
+from services.bm25_index import bm25_store
 
-pc = Pinecone(
-  api_key=settings.PINECONE_API_KEY
-)
-index = pc.Index(settings.PINECONE_INDEX_NAME)
+# Disk hits record their access time in the next write, or once this many are pending.
+TOUCH_FLUSH_ITEMS = 1024
 
-openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-EMBED_MODEL = "text-embedding-3-small"
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache keyed by (model, SHA-256 of normalised text).
+
+    A bounded in-memory LRU sits in front of a SQLite table on disk. Both
+    tiers are size-bounded: the LRU drops its least recently used vectors,
+    and the disk tier deletes the least recently accessed rows once it grows
+    past `max_disk_items`. Access times of disk hits are written with the
+    next insert rather than committed on every read.
+
+    All methods touch SQLite, so async callers run them in a thread.
+    """
+
+    def __init__(self, path: str, model: str, max_memory_items: int, max_disk_items: int):
+        self.model = model
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._touched: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+        self._conn.commit()
+        self._disk_items = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.split())
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha256(self.normalize(text).encode("utf-8")).hexdigest()
+        return f"{self.model}:{digest}"
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            disk_keys = []
+            for key in dict.fromkeys(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector.tolist()
+                else:
+                    disk_keys.append(key)
+
+            if disk_keys:
+                placeholders = ",".join("?" * len(disk_keys))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", disk_keys
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, vector)
+                    found[key] = vector.tolist()
+                now = time.time()
+                for key, _ in rows:
+                    self._touched[key] = now
+                self.disk_hits += len(rows)
+                if len(self._touched) >= TOUCH_FLUSH_ITEMS:
+                    self._flush_touched()
+                    self._conn.commit()
+
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items: dict[str, list[float]]) -> None:
+        if not items:
+            return
+        with self._lock:
+            now = time.time()
+            rows = []
+            for key, values in items.items():
+                vector = np.asarray(values, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes(), now))
+
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)", rows
+            )
+            self._disk_items += cursor.rowcount
+            self._flush_touched()
+            self._evict()
+            self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        # Called with the lock held; the caller commits.
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        overflow = self._disk_items - self.max_disk_items
+        if overflow <= 0:
+            return
+        # Evict an extra 10% so we don't run a DELETE on every insert.
+        to_remove = overflow + self.max_disk_items // 10
+        cursor = self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+            (to_remove,)
+        )
+        self._disk_items -= cursor.rowcount
+        self.evictions += cursor.rowcount
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "memory_items": len(self._memory),
+            "disk_items": self._disk_items,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
 
 def split_text(text: str, chunk_size=500, chunk_overlap=100) -> list[str]:
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    return splitter.split_text(text)
+    """Splits plain text with the native chunker; sizes are in characters as before."""
+    units = [DocumentUnit(text=text)]
+    chunks = chunk_units(units, chunk_size // CHARS_PER_TOKEN, chunk_overlap // CHARS_PER_TOKEN)
+    return [chunk.text for chunk in chunks]
+
+def _as_chunk(item: Chunk | str, index: int) -> Chunk:
+    if isinstance(item, Chunk):
+        return item
+    return Chunk(text=item, index=index, start=0, end=len(item))
+
+async def embed_texts(texts: list[str]) -> list[list[float]]:
+    """Embeds texts through the embedding cache; only cache misses reach the API."""
+    embedding_cache = clients.embedding_cache
+    keys = [embedding_cache.key(text) for text in texts]
+    vectors = await asyncio.to_thread(embedding_cache.get_many, keys)
+
+    missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+    if missing:
+        embedded = await embedding_batcher.embed(list(missing.values()))
+        new_vectors = dict(zip(missing.keys(), embedded))
+        await asyncio.to_thread(embedding_cache.put_many, new_vectors)
+        vectors.update(new_vectors)
+
+    return [vectors[key] for key in keys]
 
 async def embed_text_batch(texts: list[str]) -> list[list[float]]:
     try:
         if not texts:
             raise ValueError("No texts provided for embedding")
         
-        response = openai_client.embeddings.create(
-            input=texts,
-            model=EMBED_MODEL
-        )
-        
-        return [item.embedding for item in response.data]
+        return await embed_texts(texts)
     
     except Exception as e:
         print(f"Error in embed_text_batch: {e}")
         return []
   
-async def embed_and_upsert(chunks: list[str], namespace: str):
-    print(f"Embedding and upserting {len(chunks)} chunks into namespace: {namespace}")
-    try:
-        batch_size = 100
-        total_batches = (len(chunks) + batch_size - 1) // batch_size
-        total_inserted = 0
+async def _aiter(items: Iterable | AsyncIterable) -> AsyncIterator:
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
 
-        print(f"🧮 Total batches to process: {total_batches} (batch size = {batch_size})")
+async def with_retries(operation: Callable[[], Awaitable], description: str):
+    """Retries only the failed operation, with full-jitter exponential backoff."""
+    for attempt in range(settings.INGEST_MAX_RETRIES + 1):
+        try:
+            return await operation()
+        except Exception as e:
+            if attempt == settings.INGEST_MAX_RETRIES:
+                raise
+            delay = random.uniform(0, min(settings.INGEST_RETRY_MAX_SECONDS, settings.INGEST_RETRY_BASE_SECONDS * 2 ** attempt))
+            print(f"⚠️ {description} failed ({e}); retry {attempt + 1}/{settings.INGEST_MAX_RETRIES} in {delay:.1f}s")
+            await asyncio.sleep(delay)
 
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i + batch_size]
-            current_batch_number = (i // batch_size) + 1
-            print(f"📦 Processing batch {current_batch_number}/{total_batches}...")
+async def embed_and_upsert(
+    chunks: Iterable[Chunk | str] | AsyncIterable[Chunk | str],
+    namespace: str,
+    start_offset: int = 0,
+    on_progress: Optional[Callable[[int], Awaitable]] = None,
+):
+    """
+    Runs batching, embedding and upserting as concurrent stages connected by
+    bounded queues, so chunks can keep arriving from the parser while earlier
+    batches are embedded and written. Accepts a list or an async stream of
+    Chunks (whose offsets and page/section go into the vector metadata) or
+    plain strings.
 
-            embeddings = openai_client.embeddings.create(
-                input=batch,
-                model=EMBED_MODEL
-            )
+    Batches are cut by estimated token count (EMBED_BATCH_MAX_TOKENS), up to
+    EMBED_CONCURRENCY embedding and UPSERT_CONCURRENCY upsert batches run at
+    once, and a failed batch is retried on its own. Chunks before
+    `start_offset` were committed by an earlier run and are skipped;
+    `on_progress` receives the number of leading chunks that are fully
+    upserted each time that watermark advances.
+    """
+    print(f"Embedding and upserting chunks into namespace: {namespace} (resuming at chunk {start_offset})")
+    total_inserted = 0
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+    upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+
+    committed = start_offset
+    finished_batches: dict[int, int] = {}  # offset -> batch length, completed out of order
+
+    async def batch_stage():
+        batch, batch_tokens, offset = [], 0, 0
+        async for chunk in _aiter(chunks):
+            if offset < start_offset:
+                offset += 1
+                continue
+
+            chunk = _as_chunk(chunk, offset + len(batch))
+            tokens = estimate_tokens(chunk.text)
+            if batch and (
+                batch_tokens + tokens > settings.EMBED_BATCH_MAX_TOKENS
+                or len(batch) >= settings.EMBED_MAX_BATCH_SIZE
+            ):
+                await embed_queue.put((offset, batch))
+                offset += len(batch)
+                batch, batch_tokens = [], 0
+
+            batch.append(chunk)
+            batch_tokens += tokens
+
+        if batch:
+            await embed_queue.put((offset, batch))
+        for _ in range(settings.EMBED_CONCURRENCY):
+            await embed_queue.put(None)
+
+    async def embed_stage():
+        while (item := await embed_queue.get()) is not None:
+            offset, batch = item
+            print(f"📦 Embedding {len(batch)} chunks starting at chunk {offset}...")
+            texts = [chunk.text for chunk in batch]
+            embeddings = await with_retries(lambda: embed_texts(texts), f"Embedding batch at chunk {offset}")
+            await upsert_queue.put((offset, batch, embeddings))
+
+    async def upsert_stage():
+        nonlocal total_inserted, committed
+        while (item := await upsert_queue.get()) is not None:
+            offset, batch, embeddings = item
 
             vectors = []
-            for j, embedding in enumerate(embeddings.data):
-                text = batch[j]
-                metadata = {
-                    "text": text,
-                    "section": "unknown",
-                    "page": -1,
-                    "source": "",
-                    "type": "paragraph",
-                }
+            for j, embedding in enumerate(embeddings):
+                metadata = batch[j].metadata()
 
                 vectors.append({
-                    "id": f"{namespace}_{i + j}",
-                    "values": embedding.embedding,
+                    "id": f"{namespace}_{offset + j}",
+                    "values": embedding,
                     "metadata": metadata
                 })
 
-            print(f"⬆️ Upserting {len(vectors)} vectors from batch {current_batch_number}...")
-            response = index.upsert(vectors=vectors, namespace=namespace)
-            print(f"✅ Upsert for batch {current_batch_number} completed. Response: {response}")
+            print(f"⬆️ Upserting {len(vectors)} vectors starting at chunk {offset}...")
+            await with_retries(
+                lambda: asyncio.to_thread(clients.vector_index.upsert, vectors, namespace),
+                f"Upsert batch at chunk {offset}"
+            )
             total_inserted += len(vectors)
 
-        return {"status": "success", "inserted": total_inserted}
+            # Advance the resume watermark over every contiguous finished batch.
+            finished_batches[offset] = len(vectors)
+            advanced = False
+            while committed in finished_batches:
+                committed += finished_batches.pop(committed)
+                advanced = True
+            if advanced and on_progress:
+                await on_progress(committed)
+
+    async def embed_workers():
+        async with asyncio.TaskGroup() as workers:
+            for _ in range(settings.EMBED_CONCURRENCY):
+                workers.create_task(embed_stage())
+        for _ in range(settings.UPSERT_CONCURRENCY):
+            await upsert_queue.put(None)
+
+    try:
+        async with asyncio.TaskGroup() as pipeline:
+            pipeline.create_task(batch_stage())
+            pipeline.create_task(embed_workers())
+            for _ in range(settings.UPSERT_CONCURRENCY):
+                pipeline.create_task(upsert_stage())
+
+        print(f"🧮 Inserted {total_inserted} vectors into namespace: {namespace}")
+        return {"status": "success", "inserted": total_inserted, "total_chunks": committed}
 
     except Exception as e:
+        while isinstance(e, ExceptionGroup):
+            e = e.exceptions[0]
         print(f"❌ Error in embed_and_upsert: {e}")
-        return {"status": "error", "error": str(e)}
+        return {"status": "error", "error": str(e), "committed_chunks": committed}
 
 async def retrieve_from_kb(input_params):
     try:
@@ -89,13 +343,9 @@ async def retrieve_from_kb(input_params):
         if not agent_id:
             return {"chunks": [], "status": "error", "message": "Agent ID is required"}
 
-        query_embedding_response = openai_client.embeddings.create(
-            input=[query],
-            model=EMBED_MODEL
-        )
-        query_vector = query_embedding_response.data[0].embedding
+        query_vector = (await embed_texts([query]))[0]
 
-        results = index.query(
+        matches = clients.vector_index.query(
             vector=query_vector,
             namespace=agent_id,
             top_k=top_k,
@@ -103,7 +353,7 @@ async def retrieve_from_kb(input_params):
         )
 
         content_blocks = []
-        for match in results.matches:
+        for match in matches:
             score = match.score
             if score > 0.0:
                 metadata = match.metadata or {}
@@ -116,6 +366,105 @@ async def retrieve_from_kb(input_params):
     except Exception as e:
         print(f"Error in retrieve_from_kb: {e}")
         return {"chunks": [], "status": "error", "error": str(e)}
+
+# Counters for /hackrx/metrics.
+retrieval_stats = {"queries": 0, "bm25_fast_path": 0, "hybrid": 0, "dense_only": 0}
+
+def _bm25_is_confident(hits: list[tuple[int, float]], confidence: float) -> bool:
+    if not hits or confidence < settings.BM25_SKIP_EMBED_CONFIDENCE:
+        return False
+    return len(hits) == 1 or hits[0][1] >= settings.BM25_SKIP_EMBED_MARGIN * hits[1][1]
+
+async def retrieve_batch(
+    queries: list[str],
+    agent_id: str,
+    top_k: int = 5,
+    query_vectors: Optional[dict[str, list[float]]] = None,
+) -> list[list[dict]]:
+    """
+    Retrieval for a whole batch of questions. Returns, per query, the metadata
+    of its best chunks (text, page, section, offsets) with the match "id" and
+    fused "score" added, best first.
+
+    When the document has a BM25 index, every query is first scored lexically.
+    Queries where BM25 is confident (a clear winner that matches the query's
+    rare terms) skip dense search altogether. The rest are scored against the
+    namespace in one pass and ranked by
+    HYBRID_DENSE_WEIGHT * cosine + HYBRID_BM25_WEIGHT * (BM25 / best BM25).
+    Vectors already computed for the queries (e.g. by the semantic cache) are
+    passed as `query_vectors` and reused; only queries without one are embedded.
+    """
+    if not queries:
+        return []
+    if not agent_id:
+        raise ValueError("Agent ID is required")
+
+    bm25 = await asyncio.to_thread(bm25_store.get, agent_id) if settings.BM25_ENABLED else None
+    candidates = top_k * settings.HYBRID_CANDIDATE_FACTOR if bm25 else top_k
+    lexical = [bm25.search(query, candidates) if bm25 else ([], 0.0) for query in queries]
+
+    dense_positions = [i for i, (hits, confidence) in enumerate(lexical) if not _bm25_is_confident(hits, confidence)]
+    dense_matches: dict[int, list] = {}
+    if dense_positions:
+        vectors = dict(query_vectors or {})
+        to_embed = [queries[i] for i in dense_positions if queries[i] not in vectors]
+        if to_embed:
+            vectors.update(zip(to_embed, await embed_texts(to_embed)))
+        matches = await asyncio.to_thread(
+            clients.vector_index.query_many,
+            [vectors[queries[i]] for i in dense_positions],
+            agent_id,
+            candidates,
+            True,
+        )
+        dense_matches = dict(zip(dense_positions, matches))
+
+    # Metadata of each query's dense matches, whatever their score. BM25 hits outside
+    # them are fetched by id in one call for the whole batch.
+    known = [
+        {match.id: match.metadata for match in dense_matches.get(i, [])}
+        for i in range(len(queries))
+    ]
+    missing = {
+        f"{agent_id}_{chunk_index}"
+        for (hits, _), metadata in zip(lexical, known)
+        for chunk_index, _ in hits
+        if f"{agent_id}_{chunk_index}" not in metadata
+    }
+    fetched = await asyncio.to_thread(clients.vector_index.fetch, list(missing), agent_id) if missing else {}
+
+    retrieval_stats["queries"] += len(queries)
+    results = []
+    for i in range(len(queries)):
+        hits, _ = lexical[i]
+        dense = {match.id: match.score for match in dense_matches.get(i, []) if match.score > 0.0}
+        best_bm25 = hits[0][1] if hits else 0.0
+        bm25_scores = {f"{agent_id}_{chunk_index}": score / best_bm25 for chunk_index, score in hits}
+
+        if i not in dense_matches:
+            retrieval_stats["bm25_fast_path"] += 1
+            fused = bm25_scores
+        elif bm25_scores:
+            retrieval_stats["hybrid"] += 1
+            fused = {
+                vector_id: settings.HYBRID_DENSE_WEIGHT * dense.get(vector_id, 0.0)
+                + settings.HYBRID_BM25_WEIGHT * bm25_scores.get(vector_id, 0.0)
+                for vector_id in dense.keys() | bm25_scores.keys()
+            }
+        else:
+            retrieval_stats["dense_only"] += 1
+            fused = dense
+
+        chunks = []
+        for vector_id in sorted(fused, key=fused.get, reverse=True):
+            metadata = known[i].get(vector_id) or fetched.get(vector_id)
+            if metadata and metadata.get("text"):
+                chunks.append({**metadata, "id": vector_id, "score": fused[vector_id]})
+            if len(chunks) == top_k:
+                break
+        results.append(chunks)
+
+    return results
   
   
 FUNCTION_HANDLERS = {